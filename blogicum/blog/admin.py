@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Post, Category, Location, Comment
+from .models import Post, Category, Location, Comment, ImageBlob, Job
 
 
 class CommentInline(admin.TabularInline):
@@ -10,10 +10,12 @@ class CommentInline(admin.TabularInline):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author', 'pub_date', 'category', 'location', )
+    list_display = ('title', 'author', 'pub_date', 'category', 'location',
+                    'comment_count', )
     list_filter = ('author', 'category', 'location', 'pub_date')
     search_fields = ('title', 'text', 'author__username')
     ordering = ('-pub_date',)
+    readonly_fields = ('image_blob',)
     inlines = (CommentInline,)
 
 
@@ -31,3 +33,21 @@ class LocationAdmin(admin.ModelAdmin):
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('author', 'text', 'post',)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'argument', 'status', 'attempts', 'created_at',
+                    'started_at', 'run_after')
+    list_filter = ('status', 'task')
+    readonly_fields = ('task', 'argument', 'attempts', 'error', 'created_at',
+                       'started_at')
+
+
+@admin.register(ImageBlob)
+class ImageBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'width', 'height', 'size', 'ref_count',
+                    'created_at')
+    search_fields = ('sha256', 'name')
+    readonly_fields = ('sha256', 'name', 'width', 'height', 'size',
+                       'ref_count', 'created_at')
@@ -0,0 +1,199 @@
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+FEED_VERSION = 'feed'
+BATCH_ATTR = 'blog_invalidation_batch'
+
+
+def _initial_version():
+    # Версия, созданная заново после вытеснения ключа из кэша,
+    # не должна совпасть ни с одной из выданных ранее.
+    return int(time.time() * 1000)
+
+
+def _version_key(name):
+    return f'version:{name}'
+
+
+def get_versions(names):
+    """Возвращает текущие версии для набора имён одним обращением к кэшу.
+
+    Для тегов, изменённых в текущей транзакции, возвращаются её
+    собственные версии (см. InvalidationBatch).
+    """
+    keys = {_version_key(name): name for name in names}
+    found = cache.get_many(keys)
+    versions = {keys[key]: value for key, value in found.items()}
+    for key, name in keys.items():
+        if name not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[name] = cache.get(key)
+    batch = current_batch()
+    if batch is not None:
+        versions = batch.overlay(versions)
+    return versions
+
+
+def bump_version(name):
+    """Увеличивает версию, делая недействительными зависящие от неё ключи."""
+    key = _version_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, _initial_version(), None):
+            cache.incr(key)
+
+
+def tag_versions(*tags):
+    """Возвращает текущие версии тегов для ключа кэша."""
+    versions = get_versions(tags)
+    return tuple(versions[tag] for tag in tags)
+
+
+class InvalidationBatch:
+    """Теги, изменённые в текущей транзакции.
+
+    Общие версии тегов повышаются один раз после коммита, сколько бы
+    раз теги ни меняли в транзакции; после отката пакет забывается.
+    До коммита транзакция видит свои изменения через собственные
+    версии тегов: они не совпадают ни с одной общей, поэтому другие
+    процессы не получат из кэша незафиксированных данных.
+    """
+
+    def __init__(self, callbacks):
+        # Список колбэков on_commit, в который записан пакет. Django
+        # заменяет его новым при коммите и откате транзакции.
+        self.callbacks = callbacks
+        self.token = uuid.uuid4().hex
+        self.changes = {}
+
+    def add(self, tags):
+        for tag in tags:
+            self.changes[tag] = self.changes.get(tag, 0) + 1
+
+    def overlay(self, versions):
+        return {
+            name: (
+                f'{version}:{self.token}:{self.changes[name]}'
+                if name in self.changes else version
+            )
+            for name, version in versions.items()
+        }
+
+    def __call__(self):
+        if getattr(connection, BATCH_ATTR, None) is self:
+            setattr(connection, BATCH_ATTR, None)
+        for tag in self.changes:
+            bump_version(tag)
+
+
+def current_batch():
+    """Пакет текущей транзакции или None, если изменений в ней не было.
+
+    Пакет хранится в атрибуте соединения. Пакет завершившейся
+    транзакции узнаётся по заменённому списку колбэков on_commit.
+    После отката к точке сохранения начинается новый пакет, а прежний,
+    если его колбэк уцелел, всё равно сработает при коммите.
+    """
+    batch = getattr(connection, BATCH_ATTR, None)
+    if batch is not None and batch.callbacks is not connection.run_on_commit:
+        batch = None
+        setattr(connection, BATCH_ATTR, None)
+    return batch
+
+
+def invalidate(tags):
+    """Делает недействительным всё, что закэшировано под этими тегами.
+
+    В транзакции версии повышаются после коммита.
+    """
+    if not connection.in_atomic_block:
+        for tag in set(tags):
+            bump_version(tag)
+        return
+    batch = current_batch()
+    if batch is None:
+        batch = InvalidationBatch(connection.run_on_commit)
+        transaction.on_commit(batch)
+        setattr(connection, BATCH_ATTR, batch)
+    batch.add(set(tags))
+
+
+def _incr(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+class CacheCounter:
+    """Счётчики попаданий и промахов кэша, общие для всех процессов."""
+
+    registry = {}
+
+    def __init__(self, name):
+        self.name = name
+        self.registry[name] = self
+
+    def _key(self, outcome):
+        return f'stats:{self.name}:{outcome}'
+
+    def hit(self, count=1):
+        if count:
+            _incr(self._key('hit'), count)
+
+    def miss(self, count=1):
+        if count:
+            _incr(self._key('miss'), count)
+
+    def snapshot(self):
+        keys = {self._key(outcome): outcome for outcome in ('hit', 'miss')}
+        values = cache.get_many(keys)
+        stats = {outcome: values.get(key, 0) for key, outcome in keys.items()}
+        total = stats['hit'] + stats['miss']
+        stats['hit_rate'] = stats['hit'] / total if total else 0.0
+        return stats
+
+    def reset(self):
+        cache.delete_many([self._key('hit'), self._key('miss')])
+
+
+class CacheMetric:
+    """Наблюдения длительности, общие для всех процессов.
+
+    Хранит число наблюдений, их сумму и максимум в миллисекундах.
+    Максимум обновляется без блокировки и при гонке может занизиться.
+    """
+
+    registry = {}
+    fields = ('count', 'total_ms', 'max_ms')
+
+    def __init__(self, name):
+        self.name = name
+        self.registry[name] = self
+
+    def _key(self, field):
+        return f'metrics:{self.name}:{field}'
+
+    def observe(self, seconds):
+        ms = int(seconds * 1000)
+        _incr(self._key('count'), 1)
+        _incr(self._key('total_ms'), ms)
+        if ms > cache.get(self._key('max_ms'), -1):
+            cache.set(self._key('max_ms'), ms, None)
+
+    def snapshot(self):
+        keys = {self._key(field): field for field in self.fields}
+        values = cache.get_many(keys)
+        stats = {field: values.get(key, 0) for key, field in keys.items()}
+        stats['avg_ms'] = (
+            stats['total_ms'] / stats['count'] if stats['count'] else 0.0
+        )
+        return stats
+
+    def reset(self):
+        cache.delete_many([self._key(field) for field in self.fields])
@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .cache import CacheCounter, get_versions
+from .constance import CARD_CACHE_TIMEOUT
+from .invalidation import card_tag
+from .local_cache import attach_lookups
+from .single_flight import acquire_fill_lock, release_fill_lock
+
+card_stats = CacheCounter('post_card')
+
+
+def render_post_cards(posts):
+    """Возвращает HTML карточек, собирая их из кэша фрагментов.
+
+    Карточка хранится вместе с версией поста, поэтому после изменения
+    поста, его категории, места, автора или числа комментариев она
+    рендерится заново. Если новую версию карточки уже рендерит другой
+    процесс, отдаётся прежняя копия. Версии и фрагменты читаются
+    пакетно.
+    """
+    posts = list(posts)
+    keys = [card_tag(post.id) for post in posts]
+    versions = get_versions(keys)
+    cached = cache.get_many(keys)
+    cards = {}
+    locked = []
+    to_render = []
+    for post, key in zip(posts, keys):
+        entry = cached.get(key)
+        if entry is not None and entry[0] == versions[key]:
+            cards[key] = entry[1]
+        elif entry is None:
+            to_render.append(post)
+        elif acquire_fill_lock(key, versions[key]):
+            locked.append(key)
+            to_render.append(post)
+        else:
+            cards[key] = entry[1]
+    attach_lookups(to_render)
+    rendered = {}
+    for post in to_render:
+        key = card_tag(post.id)
+        cards[key] = render_to_string(
+            'includes/post_card.html', {'post': post}
+        )
+        rendered[key] = (versions[key], cards[key])
+    if rendered:
+        cache.set_many(rendered, CARD_CACHE_TIMEOUT)
+    for key in locked:
+        release_fill_lock(key, versions[key])
+    card_stats.hit(len(posts) - len(rendered))
+    card_stats.miss(len(rendered))
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,46 @@
+"""Кэш фрагментов ветки комментариев.
+
+Порция комментариев поста рендерится один раз на курсор и версию
+ветки (см. blog.invalidation.comments_tag). Версия повышается только
+при добавлении, изменении или удалении комментария к этому посту
+и при смене имени его автора. Кнопки автора комментария остаются
+во фрагменте заглушками и заполняются для каждого читателя.
+"""
+import hashlib
+
+from django.template.loader import render_to_string
+
+from .cache import CacheCounter, tag_versions
+from .constance import COMMENT_CACHE_TIMEOUT
+from .invalidation import comments_tag
+from .mixins import paginate_comments
+from .single_flight import FILLED, single_flight
+
+comment_stats = CacheCounter('comment_page')
+
+
+def render_comment_page(post, after=None):
+    """Возвращает HTML порции комментариев поста после курсора after.
+
+    В HTML остаются заглушки comment_controls: их заполняет
+    fill_holes при ответе.
+    """
+    cursor = hashlib.md5((after or '').encode()).hexdigest()
+    result = single_flight(
+        f'comment_page:{post.id}:{cursor}',
+        tag_versions(comments_tag(post.id)),
+        lambda: render_to_string(
+            'includes/comments.html',
+            {
+                'post': post,
+                'comments': paginate_comments(post, after),
+                'shared_page': True,
+            }
+        ),
+        COMMENT_CACHE_TIMEOUT
+    )
+    if result.state == FILLED:
+        comment_stats.miss()
+    else:
+        comment_stats.hit()
+    return result.value
@@ -0,0 +1,7 @@
+"""Настройки блога с префиксом BLOG_ в settings."""
+from django.conf import settings
+
+
+def setting(name, default):
+    """Значение настройки BLOG_<name> или default, если она не задана."""
+    return getattr(settings, f'BLOG_{name}', default)
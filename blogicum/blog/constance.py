@@ -6,3 +6,36 @@ PAGINATE_COUNT = 10
 ST_NOT_FOUND = 404
 ST_CSRF = 403
 ST_ERR = 500
+RECOUNT_CHUNK_SIZE = 500
+EXCERPT_WORDS = 10
+EXCERPT_LENGTH = 512
+USERNAME_LENGTH = 150
+CARD_CACHE_TIMEOUT = 60 * 60
+COUNT_CACHE_TIMEOUT = 30
+EXACT_COUNT_LIMIT = 10000
+VISIBILITY_BUCKET = 60
+PAGE_CACHE_TIMEOUT = 10 * 60
+COMMENTS_PAGINATE_COUNT = 20
+QUERY_CACHE_TIMEOUT = 5 * 60
+LOCAL_CACHE_SIZE = 256
+LOCAL_CACHE_TTL = 60
+LOOKUP_CACHE_TIMEOUT = 60 * 60
+FILL_LOCK_TIMEOUT = 10
+FILL_WAIT_TIMEOUT = 2
+FILL_POLL_INTERVAL = 0.05
+SWR_SOFT_TTL = 30
+SWR_HARD_TTL = 5 * 60
+REFRESH_WORKERS = 2
+WARM_CACHE_LIMIT = 50
+WARM_CACHE_WORKERS = 4
+COMMENT_CACHE_TIMEOUT = 60 * 60
+CARD_IMAGE_WIDTH = 640
+DETAIL_IMAGE_WIDTH = 1280
+RENDITION_QUALITY = 85
+RESPONSIVE_WIDTHS = (320, 640, 960, 1280)
+IMAGE_SHARD_DEPTH = 2
+IMAGE_SHARD_WIDTH = 2
+JOB_WORKERS = 2
+JOB_MAX_ATTEMPTS = 3
+JOB_STALE_TIMEOUT = 10 * 60
+JOB_RETRY_DELAY = 30
@@ -0,0 +1,37 @@
+"""Пулы потоков для фоновой работы процесса."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .conf import setting
+
+
+class LazyExecutor:
+    """Пул потоков, который создаётся при первой задаче.
+
+    Число потоков берётся из настройки BLOG_<workers_setting>. При 0
+    пул не нужен: вызывающий код выполняет задачу сам (см. workers).
+    """
+
+    def __init__(self, workers_setting, default, thread_name_prefix):
+        self.workers_setting = workers_setting
+        self.default = default
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self):
+        return setting(self.workers_setting, self.default)
+
+    def get(self):
+        """Возвращает пул, создавая его при первом обращении."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix=self.thread_name_prefix
+                )
+        return self._executor
+
+    def submit(self, func, *args):
+        return self.get().submit(func, *args)
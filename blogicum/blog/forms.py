@@ -1,10 +1,55 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
 
+from .local_cache import lookup_table
 from .models import Comment, Post
 
 
+class LookupChoiceIterator(ModelChoiceIterator):
+    """Варианты выбора из двухуровневого кэша вместо запроса к базе."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for obj in lookup_table(self.queryset.model).values():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return (
+            len(lookup_table(self.queryset.model))
+            + (self.field.empty_label is not None)
+        )
+
+
+class LookupChoiceField(forms.ModelChoiceField):
+    """Выбор объекта небольшой таблицы без запросов к базе.
+
+    И варианты, и проверка выбранного значения берутся из
+    lookup_table(), поэтому форма поста не читает категории и места
+    из базы при каждом показе и отправке.
+    """
+
+    iterator = LookupChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        model = self.queryset.model
+        if isinstance(value, model):
+            value = value.pk
+        try:
+            return lookup_table(model)[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+
 class RegisterForm(UserCreationForm):
 
     class Meta:
@@ -43,6 +88,10 @@ class PostForm(forms.ModelForm):
             'category',
             'is_published'
         )
+        field_classes = {
+            'location': LookupChoiceField,
+            'category': LookupChoiceField,
+        }
         widgets = {
             'pub_date': forms.DateTimeInput(
                 format='%Y-%m-%d %H:%M', attrs={'type': 'datetime-local'}
@@ -0,0 +1,187 @@
+"""Инвалидация кэшей блога по сигналам моделей.
+
+Каждое изменение модели переводится в набор тегов — имён версий
+из blog.cache. Всё, что закэшировано, содержит в ключе версии своих
+тегов, поэтому повышение версии делает такие ключи недействительными.
+
+=========== ==================================================
+Модель      Теги
+=========== ==================================================
+Post        feed, карточка и страница поста, страницы его
+            категории и автора (и прежних, если они сменились)
+Comment     карточка, страница и ветка комментариев поста,
+            страницы его категории и автора
+Category    feed, страница категории, карточки и страницы её постов
+Location    feed, карточки и страницы его постов, их категорий
+            и авторов
+User        feed, профиль, карточки и страницы постов пользователя,
+            страницы и ветки комментариев постов с его комментариями
+=========== ==================================================
+
+Изменения, сделанные через QuerySet.update() и bulk-операции, сигналов
+не вызывают: такой код вызывает invalidate() сам.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_init, post_save, pre_delete
+)
+
+from .cache import FEED_VERSION, invalidate
+from .models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+FEED_TAG = FEED_VERSION
+# Поля пользователя, которые выводятся на страницах блога.
+USER_FIELDS = {'username', 'first_name', 'last_name', 'is_staff'}
+
+
+def card_tag(post_id):
+    return f'post_card:{post_id}'
+
+
+def post_tag(post_id):
+    return f'post:{post_id}'
+
+
+def comments_tag(post_id):
+    return f'comments:{post_id}'
+
+
+def category_tag(category_id):
+    return f'category:{category_id}'
+
+
+def profile_tag(user_id):
+    return f'profile:{user_id}'
+
+
+def tags_for_posts(posts):
+    """Теги карточек и страниц постов, их категорий и авторов.
+
+    posts — тройки (id поста, id категории, id автора).
+    """
+    tags = set()
+    for post_id, category_id, author_id in posts:
+        tags |= {card_tag(post_id), post_tag(post_id)}
+        if category_id is not None:
+            tags.add(category_tag(category_id))
+        if author_id is not None:
+            tags.add(profile_tag(author_id))
+    return tags
+
+
+def related_posts(**lookup):
+    return Post.objects.filter(**lookup).values_list(
+        'pk', 'category_id', 'author_id'
+    )
+
+
+def post_state(post):
+    # Читаем только загруженные поля: обращение к отложенному полю
+    # стоило бы отдельного запроса на каждый созданный объект.
+    fields = vars(post)
+    return (post.pk, fields.get('category_id'), fields.get('author_id'))
+
+
+def remember_state(sender, instance, **kwargs):
+    """Запоминает связи объекта, чтобы сбросить и прежние страницы."""
+    if sender is Post:
+        instance._invalidation_state = post_state(instance)
+    else:
+        instance._invalidation_state = vars(instance).get('post_id')
+
+
+def remember_related_posts(sender, instance, **kwargs):
+    # После удаления у постов обнуляется ссылка на категорию или место,
+    # поэтому связанные посты нужно найти заранее.
+    instance._invalidation_tags = tags_for_posts(
+        related_posts(**{sender._meta.model_name: instance})
+    )
+
+
+def post_changed(sender, instance, **kwargs):
+    states = {post_state(instance), instance._invalidation_state}
+    invalidate({FEED_TAG} | tags_for_posts(states))
+    instance._invalidation_state = post_state(instance)
+
+
+def comment_changed(sender, instance, **kwargs):
+    post_ids = {instance.post_id, instance._invalidation_state}
+    invalidate(
+        tags_for_posts(related_posts(pk__in=post_ids))
+        | {comments_tag(post_id) for post_id in post_ids if post_id}
+    )
+    instance._invalidation_state = instance.post_id
+
+
+def category_changed(sender, instance, **kwargs):
+    invalidate(
+        {FEED_TAG, category_tag(instance.pk)}
+        | tags_for_posts(related_posts(category=instance))
+    )
+
+
+def location_changed(sender, instance, **kwargs):
+    invalidate(
+        {FEED_TAG} | tags_for_posts(related_posts(location=instance))
+    )
+
+
+def related_deleted(sender, instance, **kwargs):
+    tags = {FEED_TAG} | instance._invalidation_tags
+    if sender is Category:
+        tags.add(category_tag(instance.pk))
+    invalidate(tags)
+
+
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & USER_FIELDS:
+        return
+    commented = set(
+        Comment.objects.filter(author=instance).values_list('post', flat=True)
+    )
+    invalidate(
+        {FEED_TAG, profile_tag(instance.pk)}
+        | tags_for_posts(related_posts(author=instance))
+        | tags_for_posts(related_posts(pk__in=commented))
+        | {comments_tag(post_id) for post_id in commented}
+    )
+
+
+def m2m_handler(model, changed):
+    """Переводит m2m_changed в обработчик изменения объекта модели."""
+    def handler(sender, instance, action, reverse, pk_set, **kwargs):
+        if not action.startswith('post_'):
+            return
+        objects = [instance]
+        if reverse:
+            objects = model._default_manager.filter(pk__in=pk_set or ())
+        for obj in objects:
+            changed(sender=model, instance=obj)
+    return handler
+
+
+HANDLERS = {
+    Post: post_changed,
+    Comment: comment_changed,
+    Category: category_changed,
+    Location: location_changed,
+    User: user_changed,
+}
+
+for model in (Post, Comment):
+    post_init.connect(remember_state, sender=model)
+for model in (Category, Location):
+    pre_delete.connect(remember_related_posts, sender=model)
+    post_delete.connect(related_deleted, sender=model)
+for model, changed in HANDLERS.items():
+    post_save.connect(changed, sender=model)
+    if model not in (Category, Location):
+        post_delete.connect(changed, sender=model)
+    for field in model._meta.many_to_many:
+        m2m_changed.connect(
+            m2m_handler(model, changed),
+            sender=field.remote_field.through,
+            weak=False
+        )
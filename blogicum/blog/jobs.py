@@ -0,0 +1,157 @@
+"""Локальная очередь фоновых заданий.
+
+Задания хранятся в таблице Job той же базы, поэтому попадают в очередь
+в одной транзакции с изменением, которое их породило, и переживают
+перезапуск процесса. После фиксации транзакции задания разбирает пул
+потоков процесса (BLOG_JOB_WORKERS, при 0 — сразу в текущем потоке).
+Оставшиеся после остановки процесса задания выполняет команда run_jobs.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .cache import CacheMetric
+from .conf import setting
+from .constance import (
+    JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY, JOB_STALE_TIMEOUT, JOB_WORKERS
+)
+from .executors import LazyExecutor
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+job_wait = CacheMetric('job_wait')
+job_run = CacheMetric('job_run')
+
+executor = LazyExecutor('JOB_WORKERS', JOB_WORKERS, 'blog-jobs')
+
+
+def task(name):
+    """Регистрирует функцию, выполняющую задания с именем name.
+
+    Функция получает строковый аргумент задания.
+    """
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, argument=''):
+    """Ставит задание в очередь в текущей транзакции.
+
+    Выполнение начинается после её фиксации.
+    """
+    if name not in TASKS:
+        raise KeyError(f'Неизвестная задача: {name}')
+    job = Job.objects.create(task=name, argument=str(argument))
+    transaction.on_commit(dispatch)
+    return job
+
+
+def _run_in_thread():
+    try:
+        run_pending()
+    finally:
+        connections.close_all()
+
+
+def dispatch():
+    """Запускает разбор очереди в пуле потоков."""
+    if not executor.workers:
+        run_pending()
+        return
+    executor.submit(_run_in_thread)
+
+
+def claim_next():
+    """Забирает самое старое ожидающее задание или возвращает None.
+
+    Задания, время повтора которых ещё не наступило, пропускаются.
+    Задание переводится в RUNNING условным UPDATE, поэтому одно
+    задание достаётся только одному потоку или процессу.
+    """
+    while True:
+        job = Job.objects.filter(
+            status=Job.PENDING, run_after__lte=timezone.now()
+        ).first()
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job.pk, status=Job.PENDING).update(
+            status=Job.RUNNING, started_at=now, attempts=F('attempts') + 1
+        )
+        if claimed:
+            job.status, job.started_at = Job.RUNNING, now
+            job.attempts += 1
+            return job
+
+
+def retry_delay(attempts):
+    """Пауза перед повтором, удваивается с каждой неудачной попыткой."""
+    delay = setting('JOB_RETRY_DELAY', JOB_RETRY_DELAY)
+    return timedelta(seconds=delay * 2 ** (attempts - 1))
+
+
+def run_job(job):
+    """Выполняет забранное задание; возвращает True при успехе.
+
+    Выполненное задание удаляется. После ошибки задание возвращается
+    в очередь, пока не исчерпаны BLOG_JOB_MAX_ATTEMPTS попыток.
+    Повтор откладывается на retry_delay(): его выполнит следующий
+    разбор очереди или команда run_jobs.
+    """
+    job_wait.observe((job.started_at - job.created_at).total_seconds())
+    started = time.monotonic()
+    try:
+        TASKS[job.task](job.argument)
+    except Exception as error:
+        logger.exception('Задание %s завершилось ошибкой', job)
+        max_attempts = setting('JOB_MAX_ATTEMPTS', JOB_MAX_ATTEMPTS)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.PENDING if job.attempts < max_attempts else Job.FAILED,
+            error=repr(error),
+            run_after=timezone.now() + retry_delay(job.attempts)
+        )
+        return False
+    finally:
+        job_run.observe(time.monotonic() - started)
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def run_pending(limit=None):
+    """Выполняет ожидающие задания; возвращает число обработанных."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
+
+
+def requeue_stale(timeout=None):
+    """Возвращает в очередь задания, брошенные остановленным процессом."""
+    if timeout is None:
+        timeout = setting('JOB_STALE_TIMEOUT', JOB_STALE_TIMEOUT)
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        started_at__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(status=Job.PENDING)
+
+
+def queue_depth():
+    """Число заданий в очереди по состояниям."""
+    depth = dict.fromkeys((status for status, _ in Job.STATUSES), 0)
+    depth.update(
+        Job.objects.order_by().values_list('status').annotate(Count('id'))
+    )
+    return depth
@@ -0,0 +1,115 @@
+"""Двухуровневый кэш для небольших, редко меняющихся таблиц.
+
+Первый уровень — ограниченный LRU с TTL в памяти процесса, второй —
+настроенный кэш Django. Запись первого уровня хранит версии своих
+тегов; версии читаются из общего кэша, поэтому после записи в таблицу
+все процессы перестают доверять своим копиям, не обращаясь к базе.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import CacheCounter, tag_versions
+from .constance import (
+    LOCAL_CACHE_SIZE, LOCAL_CACHE_TTL, LOOKUP_CACHE_TIMEOUT
+)
+from .models import Category, Location, Post
+from .query_cache import table_tag
+
+local_stats = CacheCounter('local_cache')
+
+
+class LocalCache:
+    """Потокобезопасный LRU-кэш процесса с ограничением времени жизни."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, stamp):
+        """Возвращает значение, если оно не устарело и версии совпадают."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, entry_stamp, value = entry
+            if expires_at < time.monotonic() or entry_stamp != stamp:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, stamp, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalCache(
+    getattr(settings, 'BLOG_LOCAL_CACHE_SIZE', LOCAL_CACHE_SIZE),
+    getattr(settings, 'BLOG_LOCAL_CACHE_TTL', LOCAL_CACHE_TTL)
+)
+
+
+def two_tier_get(key, tags, fill, timeout):
+    """Возвращает значение из памяти процесса, общего кэша или fill().
+
+    Значения первого уровня общие для потоков процесса: изменять
+    полученные объекты нельзя.
+    """
+    stamp = tag_versions(*tags)
+    value = local_cache.get(key, stamp)
+    if value is not None:
+        local_stats.hit()
+        return value
+    local_stats.miss()
+    shared_key = f'{key}:{":".join(map(str, stamp))}'
+    value = cache.get(shared_key)
+    if value is None:
+        value = fill()
+        cache.set(shared_key, value, timeout)
+    local_cache.set(key, stamp, value)
+    return value
+
+
+def lookup_table(model):
+    """Возвращает все объекты небольшой таблицы в словаре по pk."""
+    return two_tier_get(
+        f'lookup:{model._meta.label_lower}',
+        [table_tag(model._meta.db_table)],
+        lambda: {obj.pk: obj for obj in model._default_manager.all()},
+        LOOKUP_CACHE_TIMEOUT
+    )
+
+
+def category_by_slug(slug):
+    """Возвращает категорию по slug или None."""
+    for category in lookup_table(Category).values():
+        if category.slug == slug:
+            return category
+    return None
+
+
+def attach_lookups(posts):
+    """Подставляет постам категории и места из двухуровневого кэша."""
+    posts = [post for post in posts if isinstance(post, Post)]
+    if not posts:
+        return
+    categories = lookup_table(Category)
+    locations = lookup_table(Location)
+    for post in posts:
+        if post.category_id in categories:
+            post.category = categories[post.category_id]
+        if post.location_id in locations:
+            post.location = locations[post.location_id]
@@ -0,0 +1,81 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.constance import PAGINATE_COUNT
+from blog.local_cache import attach_lookups
+from blog.querysets import feed_queryset, published_posts
+from blog.read_models import PostCard, card_queryset
+
+
+def model_page():
+    posts = list(feed_queryset(published_posts())[:PAGINATE_COUNT])
+    attach_lookups(posts)
+    return posts
+
+
+def card_page():
+    return list(card_queryset(published_posts())[:PAGINATE_COUNT])
+
+
+def read_page(objects):
+    """Читает у объектов всё, что выводит шаблон карточки."""
+    for obj in objects:
+        for name in PostCard.__slots__:
+            getattr(obj, name)
+
+
+def measure(build, repeat):
+    """Замеряет построение страницы функцией build.
+
+    Возвращает удерживаемую и пиковую память страницы в байтах
+    и среднее процессорное время её построения в секундах.
+    """
+    read_page(build())
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = build()
+        read_page(objects)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    started = time.process_time()
+    for _ in range(repeat):
+        read_page(build())
+    cpu = (time.process_time() - started) / repeat
+    return retained - before, peak - before, cpu
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает память и процессорное время страницы из '
+        f'{PAGINATE_COUNT} карточек для экземпляров Post и PostCard.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=200,
+            help='Сколько раз строить страницу для замера времени.'
+        )
+
+    def handle(self, *args, **options):
+        if not published_posts().exists():
+            raise CommandError('Нет опубликованных постов для замера.')
+        results = {
+            'Post': measure(model_page, options['repeat']),
+            'PostCard': measure(card_page, options['repeat']),
+        }
+        for name, (retained, peak, cpu) in results.items():
+            self.stdout.write(
+                f'{name:>8}: память {retained / 1024:.1f} КиБ, '
+                f'пик {peak / 1024:.1f} КиБ, '
+                f'время {cpu * 1000:.2f} мс на страницу'
+            )
+        model, card = results['Post'], results['PostCard']
+        self.stdout.write(self.style.SUCCESS(
+            f'Экономия: память {1 - card[0] / model[0]:.0%}, '
+            f'пик {1 - card[1] / model[1]:.0%}, '
+            f'время {1 - card[2] / model[2]:.0%}.'
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.renditions import make_renditions
+from blog.tasks import mark_renditions_ready
+
+
+def iter_images(everything=False):
+    """Перебирает имена изображений постов, которым нужны копии.
+
+    Без everything отдаются только изображения постов, копии которых
+    ещё не отмечены готовыми.
+    """
+    posts = Post.objects.exclude(image='')
+    if not everything:
+        posts = posts.filter(renditions_ready=False)
+    return posts.order_by().values_list('image', flat=True).distinct()
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные копии изображений постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true', dest='everything',
+            help='Перестроить копии всех изображений, а не только '
+                 'недостающие.'
+        )
+
+    def handle(self, *args, **options):
+        storage = Post.image.field.storage
+        built = failed = 0
+        for name in list(iter_images(options['everything'])):
+            if make_renditions(name, storage):
+                mark_renditions_ready(name)
+                built += 1
+            else:
+                failed += 1
+                self.stderr.write(f'Не удалось обработать {name}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {built}, с ошибками: {failed}.'
+        ))
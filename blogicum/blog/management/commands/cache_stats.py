@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+# Модули регистрируют свои счётчики при импорте.
+from blog import (  # noqa: F401
+    cards, comment_cache, jobs, page_cache, paginators
+)
+from blog.cache import CacheCounter, CacheMetric
+from blog.query_cache import load_query_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает счётчики попаданий и промахов кэшей блога '
+        'и длительности их обновления.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить счётчики после вывода.'
+        )
+
+    def handle(self, *args, **options):
+        load_query_counters()
+        for name, counter in sorted(CacheCounter.registry.items()):
+            stats = counter.snapshot()
+            self.stdout.write(
+                f'{name}: попаданий {stats["hit"]}, '
+                f'промахов {stats["miss"]}, '
+                f'доля попаданий {stats["hit_rate"]:.1%}'
+            )
+            if options['reset']:
+                counter.reset()
+        for name, metric in sorted(CacheMetric.registry.items()):
+            stats = metric.snapshot()
+            self.stdout.write(
+                f'{name}: наблюдений {stats["count"]}, '
+                f'среднее {stats["avg_ms"]:.0f} мс, '
+                f'максимум {stats["max_ms"]} мс'
+            )
+            if options['reset']:
+                metric.reset()
+        depth = jobs.queue_depth()
+        self.stdout.write(
+            f'Очередь заданий: ожидают {depth["pending"]}, '
+            f'выполняются {depth["running"]}, с ошибкой {depth["failed"]}'
+        )
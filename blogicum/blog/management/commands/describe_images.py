@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog.cache import invalidate
+from blog.invalidation import related_posts, tags_for_posts
+from blog.models import ImageBlob, Post
+from blog.timeline import refresh_timeline
+
+
+def iter_undescribed_images():
+    """Перебирает имена изображений постов без сохранённых сведений."""
+    return Post.objects.exclude(image='').filter(
+        image_blob__isnull=True
+    ).order_by().values_list('image', flat=True).distinct()
+
+
+def describe_stored_image(name, storage):
+    """Сохраняет сведения об изображении name у всех его постов.
+
+    update не отправляет сигналов, поэтому ссылки на изображение
+    учитываются здесь же. Возвращает False, если файл не читается
+    как изображение.
+    """
+    with storage.open(name) as file, transaction.atomic():
+        blob = ImageBlob.for_file(file)
+        if blob is None:
+            return False
+        post_ids = list(
+            Post.objects.filter(
+                image=name, image_blob__isnull=True
+            ).values_list('pk', flat=True)
+        )
+        Post.objects.filter(pk__in=post_ids).update(
+            image_blob=blob, updated_at=timezone.now()
+        )
+        ImageBlob.change_refs(blob.pk, len(post_ids), name)
+    invalidate(tags_for_posts(related_posts(pk__in=post_ids)))
+    refresh_timeline(post_ids)
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        'Сохраняет размеры, объём и хэш изображений, загруженных '
+        'до появления этих сведений.'
+    )
+
+    def handle(self, *args, **options):
+        storage = Post.image.field.storage
+        described = failed = 0
+        for name in list(iter_undescribed_images()):
+            try:
+                ok = describe_stored_image(name, storage)
+            except OSError:
+                ok = False
+            if ok:
+                described += 1
+            else:
+                failed += 1
+                self.stderr.write(f'Не удалось прочитать {name}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {described}, с ошибками: {failed}.'
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from blog.constance import RECOUNT_CHUNK_SIZE
+from blog.models import TimelineEntry
+from blog.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = 'Полностью пересобирает материализованную ленту главной страницы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=RECOUNT_CHUNK_SIZE,
+            help='Сколько постов обрабатывать за один проход.'
+        )
+
+    def handle(self, *args, **options):
+        rebuild_timeline(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в ленте: {TimelineEntry.objects.count()}.'
+        ))
@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from blog.cache import invalidate
+from blog.constance import RECOUNT_CHUNK_SIZE
+from blog.invalidation import related_posts, tags_for_posts
+from blog.models import Comment, Post
+from blog.timeline import refresh_timeline
+
+
+def iter_comment_count_drift(chunk_size=RECOUNT_CHUNK_SIZE):
+    """Перебирает посты порциями и отдаёт id постов с неверным счётчиком."""
+    last_pk = 0
+    while True:
+        chunk = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', 'comment_count'
+            )[:chunk_size]
+        )
+        if not chunk:
+            return
+        last_pk = chunk[-1][0]
+        actual = dict(
+            Comment.objects.filter(
+                post_id__in=[pk for pk, _ in chunk]
+            ).order_by().values_list('post_id').annotate(total=Count('id'))
+        )
+        drifted = [
+            pk for pk, stored in chunk if stored != actual.get(pk, 0)
+        ]
+        if drifted:
+            yield drifted
+
+
+def recount_comments(post_ids):
+    """Пересчитывает счётчики указанных постов одним UPDATE.
+
+    update не отправляет сигналов, поэтому строки ленты и карточки
+    с прежним числом комментариев обновляются здесь же.
+    """
+    totals = Comment.objects.filter(
+        post=OuterRef('pk')
+    ).order_by().values('post').annotate(total=Count('id')).values('total')
+    updated = Post.objects.filter(pk__in=post_ids).update(
+        comment_count=Coalesce(Subquery(totals), 0),
+        updated_at=timezone.now()
+    )
+    invalidate(tags_for_posts(related_posts(pk__in=post_ids)))
+    refresh_timeline(post_ids)
+    return updated
+
+
+class Command(BaseCommand):
+    help = 'Проверяет и пересчитывает сохранённые счётчики комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=RECOUNT_CHUNK_SIZE,
+            help='Сколько постов обрабатывать за один проход.'
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только найти расхождения, ничего не исправляя.'
+        )
+
+    def handle(self, *args, **options):
+        drifted_total = 0
+        for post_ids in iter_comment_count_drift(options['chunk_size']):
+            drifted_total += len(post_ids)
+            if not options['check']:
+                recount_comments(post_ids)
+        if options['check']:
+            if drifted_total:
+                raise CommandError(
+                    f'Счётчик комментариев расходится у {drifted_total} '
+                    'постов.'
+                )
+            self.stdout.write('Расхождений не найдено.')
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено постов: {drifted_total}.')
+        )
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import invalidate
+from blog.constance import RECOUNT_CHUNK_SIZE
+from blog.invalidation import card_tag, post_tag
+from blog.models import Post
+from blog.timeline import refresh_timeline
+
+
+def iter_posts_to_render(chunk_size=RECOUNT_CHUNK_SIZE, everything=False):
+    """Перебирает порциями посты, у которых не заполнен сохранённый HTML.
+
+    При everything отдаются все посты, например после смены правил
+    рендеринга текста.
+    """
+    posts = Post.objects.only('pk', 'text').order_by('pk')
+    if not everything:
+        posts = posts.filter(rendered_html='').exclude(text='')
+    last_pk = 0
+    while True:
+        chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return
+        last_pk = chunk[-1].pk
+        yield chunk
+
+
+def render_posts(posts):
+    """Пересчитывает отрывок и HTML постов одним запросом на порцию.
+
+    bulk_update не отправляет сигналов, поэтому карточки, страницы
+    постов и строки ленты обновляются здесь же.
+    """
+    for post in posts:
+        post.render_text()
+    Post.objects.bulk_update(posts, ('excerpt', 'rendered_html'))
+    post_ids = [post.pk for post in posts]
+    invalidate([
+        tag for post_id in post_ids
+        for tag in (card_tag(post_id), post_tag(post_id))
+    ])
+    refresh_timeline(post_ids)
+
+
+class Command(BaseCommand):
+    help = 'Заполняет сохранённые отрывок и HTML текста постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=RECOUNT_CHUNK_SIZE,
+            help='Сколько постов обрабатывать за один проход.'
+        )
+        parser.add_argument(
+            '--all', action='store_true', dest='everything',
+            help='Пересчитать все посты, а не только незаполненные.'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for posts in iter_posts_to_render(
+            options['chunk_size'], options['everything']
+        ):
+            render_posts(posts)
+            total += len(posts)
+        self.stdout.write(self.style.SUCCESS(f'Обработано постов: {total}.'))
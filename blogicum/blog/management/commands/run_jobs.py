@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from blog.jobs import queue_depth, requeue_stale, run_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задания фоновой очереди, оставшиеся после остановки '
+        'процессов, и показывает её глубину.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int,
+            help='Сколько заданий выполнить; по умолчанию — все.'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Только показать глубину очереди.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['stats']:
+            requeued = requeue_stale()
+            done = run_pending(options['limit'])
+            self.stdout.write(
+                f'Возвращено в очередь: {requeued}, обработано: {done}.'
+            )
+        depth = queue_depth()
+        self.stdout.write(
+            f'Ожидают: {depth["pending"]}, выполняются: {depth["running"]}, '
+            f'с ошибкой: {depth["failed"]}.'
+        )
@@ -0,0 +1,188 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, zip_longest
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.views.generic import TemplateView
+
+from blog import urls as blog_urls
+from blog.constance import WARM_CACHE_LIMIT, WARM_CACHE_WORKERS
+from blog.mixins import SharedPageMixin
+from blog.querysets import published_posts
+from pages import urls as pages_urls
+
+
+def _ranked(field, limit):
+    """Значения поля опубликованных постов по убыванию числа постов."""
+    return published_posts().order_by().values(field).annotate(
+        total=Count('id')
+    ).order_by('-total', field).values_list(field, flat=True)[:limit]
+
+
+def hot_posts(limit):
+    # Счётчика просмотров нет: самые читаемые посты — самые обсуждаемые.
+    return [
+        {'post_id': pk} for pk in published_posts().order_by(
+            '-comment_count', '-pub_date'
+        ).values_list('pk', flat=True)[:limit]
+    ]
+
+
+def hot_categories(limit):
+    return [{'slug': slug} for slug in _ranked('category__slug', limit)]
+
+
+def hot_profiles(limit):
+    return [
+        {'username': username}
+        for username in _ranked('author__username', limit)
+    ]
+
+
+# Кэши, которые видит только процесс команды: прогревать их бесполезно.
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+# Страницы с параметрами прогреваются только для самых посещаемых
+# объектов; остальные маршруты с параметрами пропускаются.
+HOT_OBJECTS = {
+    'blog:post_detail': hot_posts,
+    'blog:category_posts': hot_categories,
+    'blog:profile': hot_profiles,
+}
+
+
+def _is_page(pattern):
+    """Общая для всех читателей страница, которую стоит прогревать."""
+    view_class = getattr(pattern.callback, 'view_class', None)
+    return view_class is not None and issubclass(
+        view_class, (SharedPageMixin, TemplateView)
+    )
+
+
+def hot_pages(limit):
+    """Возвращает до limit адресов страниц в порядке их прогрева.
+
+    Первыми идут страницы без параметров из blog/urls.py
+    и pages/urls.py, затем поочерёдно самые посещаемые посты,
+    категории и профили.
+    """
+    static, ranked = [], []
+    for module in (blog_urls, pages_urls):
+        for pattern in module.urlpatterns:
+            name = f'{module.app_name}:{pattern.name}'
+            if name in HOT_OBJECTS:
+                ranked.append([
+                    reverse(name, kwargs=kwargs)
+                    for kwargs in HOT_OBJECTS[name](limit)
+                ])
+            elif not pattern.pattern.converters and _is_page(pattern):
+                static.append(reverse(name))
+    interleaved = [
+        path for path in chain.from_iterable(zip_longest(*ranked))
+        if path is not None
+    ]
+    return (static + interleaved)[:limit]
+
+
+def warm_page(path, user):
+    """Рендерит страницу и возвращает код ответа и время в секундах."""
+    request = RequestFactory().get(path)
+    request.user = user
+    match = resolve(path)
+    started = time.monotonic()
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response.status_code, time.monotonic() - started
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэши самых посещаемых страниц, чтобы после '
+        'развёртывания первые читатели не ждали рендеринга. Нужен '
+        'общий для всех процессов кэш (Redis, Memcached, база данных): '
+        'с LocMemCache страницы попали бы только в кэш самой команды.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=WARM_CACHE_LIMIT,
+            help='Сколько страниц прогреть.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=WARM_CACHE_WORKERS,
+            help='Сколько страниц рендерить одновременно.'
+        )
+        parser.add_argument(
+            '--username',
+            help=(
+                'От чьего имени открывать страницы. По умолчанию '
+                'используется несохранённый пользователь: общая часть '
+                'страниц от пользователя не зависит.'
+            )
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Прогревать и кэш, который не виден другим процессам.'
+        )
+
+    def check_cache(self, force):
+        if not isinstance(caches['default'], PROCESS_LOCAL_CACHES):
+            return
+        backend = type(caches['default']).__name__
+        if not force:
+            raise CommandError(
+                f'Кэш {backend} не виден процессам сервера, прогрев '
+                'ничего не даст. Настройте общий кэш в CACHES или '
+                'запустите команду с --force.'
+            )
+        self.stderr.write(f'Кэш {backend} виден только этому процессу.')
+
+    def get_user(self, username):
+        if username is None:
+            return User(username='warm_cache')
+        try:
+            return User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {username} не найден.')
+
+    def handle(self, *args, **options):
+        self.check_cache(options['force'])
+        user = self.get_user(options['username'])
+        paths = hot_pages(options['limit'])
+        started = time.monotonic()
+        failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [
+                (path, pool.submit(warm_page, path, user)) for path in paths
+            ]
+            for path, future in futures:
+                try:
+                    status, seconds = future.result()
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{path}: {error!r}')
+                    continue
+                self.stdout.write(
+                    f'{seconds * 1000:7.0f} мс  {status}  {path}'
+                )
+        elapsed = time.monotonic() - started
+        message = (
+            f'Прогрето страниц: {len(paths) - failed} из {len(paths)} '
+            f'за {elapsed * 1000:.0f} мс.'
+        )
+        self.stdout.write(
+            self.style.ERROR(message) if failed
+            else self.style.SUCCESS(message)
+        )
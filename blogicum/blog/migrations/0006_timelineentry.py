@@ -0,0 +1,65 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:43
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def fill_timeline(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    TimelineEntry = apps.get_model('blog', 'TimelineEntry')
+    posts = Post.objects.filter(
+        is_published=True, category__is_published=True
+    ).select_related('author', 'category', 'location')
+    TimelineEntry.objects.bulk_create(
+        TimelineEntry(
+            id=post.id,
+            pub_date=post.pub_date,
+            title=post.title,
+            excerpt=Truncator(post.text).words(10, truncate=' …'),
+            image=post.image.name,
+            category_slug=post.category.slug,
+            category_title=post.category.title,
+            location_name=(
+                post.location.name
+                if post.location and post.location.is_published else ''
+            ),
+            author_username=post.author.username,
+            comment_count=post.comment_count,
+        )
+        for post in posts.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID публикации')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата и время публикации')),
+                ('title', models.CharField(max_length=256, verbose_name='Заголовок')),
+                ('excerpt', models.TextField(verbose_name='Начало текста')),
+                ('image', models.ImageField(blank=True, upload_to='post_images', verbose_name='Изображение')),
+                ('category_slug', models.SlugField(max_length=64, verbose_name='Идентификатор категории')),
+                ('category_title', models.CharField(max_length=256, verbose_name='Название категории')),
+                ('location_name', models.CharField(blank=True, max_length=256, verbose_name='Название места')),
+                ('author_username', models.CharField(max_length=150, verbose_name='Автор')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Количество комментариев')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Лента',
+                'ordering': ('-pub_date', '-id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['pub_date', 'id'], name='timeline_pub_date_idx'),
+        ),
+        migrations.RunPython(fill_timeline, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:20
+
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+
+def fill_rendered_text(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    TimelineEntry = apps.get_model('blog', 'TimelineEntry')
+    for post in Post.objects.only('pk', 'text').iterator():
+        excerpt = Truncator(
+            Truncator(post.text).words(10, truncate=' …')
+        ).chars(512)
+        Post.objects.filter(pk=post.pk).update(
+            excerpt=excerpt, rendered_html=linebreaksbr(post.text)
+        )
+        TimelineEntry.objects.filter(pk=post.pk).update(excerpt=excerpt)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=512, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rendered_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(fill_rendered_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_excerpt_rendered_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=256, verbose_name='Задача')),
+                ('argument', models.CharField(blank=True, max_length=256, verbose_name='Аргумент')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('running', 'Выполняется'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Состояние')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начато')),
+            ],
+            options={
+                'verbose_name': 'фоновое задание',
+                'verbose_name_plural': 'Фоновые задания',
+                'ordering': ('created_at', 'id'),
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='renditions_ready',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Копии изображения готовы'),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='renditions_ready',
+            field=models.BooleanField(default=False, verbose_name='Копии изображения готовы'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='job_status_idx'),
+        ),
+    ]
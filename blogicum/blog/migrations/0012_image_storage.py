@@ -0,0 +1,47 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:29
+
+import blog.storage
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def fill_image_refs(apps, schema_editor):
+    ImageBlob = apps.get_model('blog', 'ImageBlob')
+    blobs = ImageBlob.objects.annotate(
+        total=Count('posts'), first_name=Min('posts__image')
+    ).filter(total__gt=0)
+    for blob in blobs.iterator():
+        ImageBlob.objects.filter(pk=blob.pk).update(
+            ref_count=blob.total, name=blob.first_name
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_image_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imageblob',
+            name='name',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Имя файла'),
+        ),
+        migrations.AddField(
+            model_name='imageblob',
+            name='ref_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Число публикаций'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=blog.storage.ContentAddressedStorage(), upload_to='post_images', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='timelineentry',
+            name='image',
+            field=models.ImageField(blank=True, storage=blog.storage.ContentAddressedStorage(), upload_to='post_images', verbose_name='Изображение'),
+        ),
+        migrations.RunPython(fill_image_refs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_updated_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='run_after',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Не раньше'),
+        ),
+    ]
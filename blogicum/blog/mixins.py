@@ -1,9 +1,19 @@
-from django.core.paginator import Paginator
+import hashlib
+
 from django.shortcuts import redirect, get_object_or_404
-from django.http import HttpResponseForbidden
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, quote_etag
+)
+from django.utils.http import http_date
 
-from .constance import PAGINATE_COUNT
+from .cache import FEED_VERSION, get_versions
+from .constance import COMMENTS_PAGINATE_COUNT, PAGINATE_COUNT
 from .models import Post
+from .page_cache import fill_holes, get_shared_page, shared_page_cache_enabled
+from .single_flight import STALE
+from .paginators import CursorPaginator, FeedPaginator
+from .querysets import COMMENT_ORDERING, FEED_ORDERING
 
 
 class PostCheckMixin:
@@ -30,6 +40,106 @@ class PostCheckMixin:
         return super().dispatch(request, *args, **kwargs)
 
 
+class ConditionalGetMixin:
+    """Mixin для ответа 304 Not Modified на повторный GET-запрос.
+
+    Наследник реализует get_validators(): дешёвые значения, по которым
+    видно изменение страницы, и дату последнего изменения. Если они
+    совпадают с присланными браузером, шаблон не рендерится.
+
+    Дату возвращают только страницы, у которых её сдвигает любое
+    изменение. У списков это не так: после удаления, снятия
+    с публикации или появления отложенного поста наибольший updated_at
+    оставшихся постов не растёт. Такие страницы возвращают None
+    и проверяются только по ETag.
+    """
+
+    # Прежнюю копию страницы отдают без валидаторов, иначе браузер
+    # запомнил бы её под ETag свежей версии.
+    page_is_stale = False
+
+    def get_validators(self):
+        """Пара (значения для ETag, last_modified или None) либо None."""
+        raise NotImplementedError
+
+    def get_page_key(self, parts):
+        """Ключ содержимого страницы, общего для всех пользователей."""
+        return repr((
+            self.request.get_full_path(),
+            get_versions([FEED_VERSION])[FEED_VERSION],
+            parts,
+        ))
+
+    def get_etag(self, parts):
+        # Шапка, ссылки автора и CSRF-токен зависят от пользователя,
+        # поэтому ETag у каждого пользователя свой.
+        request = self.request
+        key = repr((
+            self.get_page_key(parts),
+            request.user.pk,
+            request.META.get('CSRF_COOKIE'),
+        ))
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def render_page(self, parts, *args, **kwargs):
+        """Рендерит страницу, когда браузеру нужен полный ответ."""
+        response = super().get(self.request, *args, **kwargs)
+        response.render()
+        return response
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        parts, last_modified = validators
+        parts = (parts, last_modified)
+        timestamp = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=self.get_etag(parts), last_modified=timestamp
+        )
+        if response is None:
+            response = self.render_page(parts, *args, **kwargs)
+        if not self.page_is_stale:
+            # Токен мог появиться только при рендеринге шаблона.
+            response['ETag'] = self.get_etag(parts)
+            if timestamp:
+                response['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class SharedPageMixin(ConditionalGetMixin):
+    """Mixin для страниц, общих для всех пользователей.
+
+    Страница рендерится один раз на URL и набор валидаторов, а вместо
+    шапки, кнопок автора и CSRF-токена в ней остаются заглушки.
+    Заглушки заполняются для текущего пользователя при каждом ответе.
+    При stale_while_revalidate устаревшая страница отдаётся сразу,
+    а свежая рендерится в фоне.
+    """
+
+    stale_while_revalidate = False
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['shared_page'] = shared_page_cache_enabled()
+        return context
+
+    def render_page(self, parts, *args, **kwargs):
+        if not shared_page_cache_enabled():
+            return super().render_page(parts, *args, **kwargs)
+        result = get_shared_page(
+            self.request.get_full_path(),
+            self.get_page_key(parts),
+            lambda: super(SharedPageMixin, self).render_page(
+                parts, *args, **kwargs
+            ).content.decode(),
+            revalidate=self.stale_while_revalidate
+        )
+        self.page_is_stale = result.state == STALE
+        return HttpResponse(fill_holes(result.value, self.request))
+
+
 class PostMixin:
     """Mixin для модели Post."""
 
@@ -37,7 +147,30 @@ class PostMixin:
 
 
 def paginate_queryset(queryset, request):
-    """Функция для пагинации переданного queryset."""
-    paginator = Paginator(queryset, PAGINATE_COUNT)
+    """Функция для пагинации переданного queryset.
+
+    При наличии в запросе курсора ``after`` или ``before`` страница
+    выбирается по ключу (pub_date, id), иначе — по номеру ``page``.
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after or before:
+        paginator = CursorPaginator(queryset, PAGINATE_COUNT, FEED_ORDERING)
+        return paginator.get_page(after=after, before=before)
+    paginator = FeedPaginator(queryset, PAGINATE_COUNT, FEED_ORDERING)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def paginate_comments(post, after=None):
+    """Возвращает порцию комментариев поста после курсора ``after``.
+
+    Комментарии выбираются по ключу (created_at, id), поэтому каждая
+    следующая порция читается из индекса без OFFSET.
+    """
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        COMMENTS_PAGINATE_COUNT,
+        COMMENT_ORDERING
+    )
+    return paginator.get_page(after=after)
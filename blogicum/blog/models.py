@@ -1,7 +1,18 @@
-from django.db import models
+from functools import partial
+
+from django.db import models, transaction
+from django.template.defaultfilters import filesizeformat, linebreaksbr
+from django.utils import timezone
+from django.utils.text import Truncator
 
 from core.models import PublishedModel, TitleModel, AuthorModel
-from .constance import TITLE_LENGTH, SLUG_LENGTH, TEXT_LENGTH
+from .constance import (
+    TITLE_LENGTH, SLUG_LENGTH, TEXT_LENGTH, COMM_DEFAULT, EXCERPT_WORDS,
+    EXCERPT_LENGTH, USERNAME_LENGTH
+)
+from .query_cache import CachedQuerySet
+from .renditions import describe_image, strip_metadata
+from .storage import post_image_storage
 
 
 class Category(PublishedModel, TitleModel):
@@ -14,6 +25,8 @@ class Category(PublishedModel, TitleModel):
                    'разрешены символы латиницы, '
                    'цифры, дефис и подчёркивание.'))
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'категория'
         verbose_name_plural = 'Категории'
@@ -22,6 +35,8 @@ class Category(PublishedModel, TitleModel):
 class Location(PublishedModel):
     name = models.CharField('Название места', max_length=TITLE_LENGTH)
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'местоположение'
         verbose_name_plural = 'Местоположения'
@@ -30,6 +45,59 @@ class Location(PublishedModel):
         return self.name
 
 
+class ImageBlob(models.Model):
+    """Сведения о содержимом загруженного изображения.
+
+    Заполняются один раз при загрузке, чтобы страницы и админка
+    не обращались к хранилищу. Одинаковые по содержимому файлы
+    описывает одна запись, а в хранилище лежит один файл (см.
+    blog.storage). Файл без ссылок удаляет фоновое задание
+    (см. blog.tasks), а имя файла у записи стирается.
+    """
+
+    sha256 = models.CharField('SHA-256', max_length=64, unique=True)
+    name = models.CharField('Имя файла', max_length=255, blank=True)
+    width = models.PositiveIntegerField('Ширина')
+    height = models.PositiveIntegerField('Высота')
+    size = models.PositiveBigIntegerField('Размер в байтах')
+    ref_count = models.PositiveIntegerField('Число публикаций', default=0)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'файл изображения'
+        verbose_name_plural = 'Файлы изображений'
+
+    def __str__(self):
+        return (
+            f'{self.width}×{self.height}, {filesizeformat(self.size)}, '
+            f'{self.sha256[:12]}'
+        )
+
+    @classmethod
+    def for_file(cls, file):
+        """Запись для содержимого file или None, если это не изображение."""
+        info = describe_image(file)
+        if info is None:
+            return None
+        sha256 = info.pop('sha256')
+        return cls.objects.select_for_update().get_or_create(
+            sha256=sha256, defaults=info
+        )[0]
+
+    @classmethod
+    def change_refs(cls, pk, delta, name=''):
+        """Атомарно изменяет число постов с этим изображением.
+
+        name запоминается как имя файла, если оно ещё не известно.
+        """
+        rows = cls.objects.filter(pk=pk)
+        if delta < 0:
+            rows = rows.filter(ref_count__gte=-delta)
+        rows.update(ref_count=models.F('ref_count') + delta)
+        if name:
+            cls.objects.filter(pk=pk, name='').update(name=name)
+
+
 class Post(PublishedModel, TitleModel, AuthorModel):
     text = models.TextField('Текст')
     pub_date = models.DateTimeField(
@@ -37,7 +105,20 @@ class Post(PublishedModel, TitleModel, AuthorModel):
         help_text=('Если установить дату и время '
                    'в будущем — можно делать отложенные публикации.'))
     image = models.ImageField(
-        'Изображение', upload_to='post_images', blank=True
+        'Изображение', upload_to='post_images', blank=True,
+        storage=post_image_storage
+    )
+    renditions_ready = models.BooleanField(
+        'Копии изображения готовы', default=False, editable=False
+    )
+    image_blob = models.ForeignKey(
+        ImageBlob,
+        related_name='posts',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Файл изображения'
     )
     location = models.ForeignKey(
         Location,
@@ -55,19 +136,127 @@ class Post(PublishedModel, TitleModel, AuthorModel):
         blank=False,
         verbose_name='Категория'
     )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=COMM_DEFAULT,
+        editable=False
+    )
+    excerpt = models.CharField(
+        'Начало текста', max_length=EXCERPT_LENGTH, blank=True, editable=False
+    )
+    rendered_html = models.TextField(
+        'Текст в HTML', blank=True, editable=False
+    )
+
+    objects = CachedQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
-
-    @property
-    def comment_count(self):
-        return self.comments.count()
+        indexes = (
+            models.Index(
+                fields=('category', 'pub_date', 'id'),
+                condition=models.Q(is_published=True),
+                name='post_published_category_idx'
+            ),
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='post_author_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    def render_text(self):
+        """Заполняет сохраняемые отрывок и HTML текста поста."""
+        excerpt = Truncator(self.text).words(EXCERPT_WORDS, truncate=' …')
+        self.excerpt = Truncator(excerpt).chars(EXCERPT_LENGTH)
+        self.rendered_html = linebreaksbr(self.text)
+
+    def save(self, *args, **kwargs):
+        if 'text' not in self.get_deferred_fields():
+            self.render_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {
+                *update_fields, 'excerpt', 'rendered_html'
+            }
+        # Файл только что загружен, если он ещё не сохранён в хранилище.
+        # Из него до расчёта хэша убираются метаданные (strip_metadata).
+        # Копии строит фоновое задание (см. blog.tasks), а до тех пор
+        # страницы показывают оригинал.
+        self._image_uploaded = (
+            'image' not in self.get_deferred_fields()
+            and bool(self.image) and not self.image._committed
+        )
+        if update_fields is not None and 'image' in update_fields:
+            kwargs['update_fields'] = {
+                *kwargs['update_fields'], 'renditions_ready', 'image_blob'
+            }
+        # Хранилище не записывает файл, который уже лежит на месте, но
+        # фоновая сборка (см. blog.tasks) может удалить его до фиксации
+        # поста: select_for_update не везде блокирует запись ImageBlob
+        # (в SQLite он ничего не делает). Поэтому после фиксации файл
+        # при необходимости записывается заново — раньше, чем задание
+        # построит копии.
+        with transaction.atomic():
+            if self._image_uploaded:
+                self.renditions_ready = False
+                self.image = strip_metadata(self.image) or self.image
+                self.image_blob = ImageBlob.for_file(self.image)
+                transaction.on_commit(
+                    partial(self._restore_image, self.image.file)
+                )
+            elif 'image' not in self.get_deferred_fields() and not self.image:
+                self.image_blob = None
+            super().save(*args, **kwargs)
+
+    def _restore_image(self, content):
+        """Записывает загруженный файл, если его успела удалить сборка."""
+        storage = self.image.storage
+        if self.image and not storage.exists(self.image.name):
+            storage.save_as(self.image.name, content)
+
+    @property
+    def image_url(self):
+        return self.image.url if self.image else ''
+
+    @property
+    def image_width(self):
+        return self.image_blob and self.image_blob.width
+
+    @property
+    def image_height(self):
+        return self.image_blob and self.image_blob.height
+
+    @property
+    def image_bytes(self):
+        return self.image_blob and self.image_blob.size
+
+    @property
+    def author_username(self):
+        return self.author.username
+
+    @property
+    def category_slug(self):
+        return self.category.slug
+
+    @property
+    def category_title(self):
+        return self.category.title
+
+    @property
+    def category_is_published(self):
+        return self.category is not None and self.category.is_published
+
+    @property
+    def location_name(self):
+        if self.location and self.location.is_published:
+            return self.location.name
+        return ''
+
 
 class Comment(AuthorModel):
     text = models.TextField('Текст комментария', max_length=TEXT_LENGTH,)
@@ -77,10 +266,126 @@ class Comment(AuthorModel):
         on_delete=models.CASCADE,)
     created_at = models.DateTimeField('Создано', auto_now_add=True,)
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_at_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text
+
+
+class TimelineEntry(models.Model):
+    """Строка материализованной ленты главной страницы.
+
+    Хранит всё, что нужно карточке видимого поста, чтобы главная
+    страница читалась одним проходом по индексу без соединений.
+    """
+
+    id = models.BigIntegerField('ID публикации', primary_key=True)
+    pub_date = models.DateTimeField('Дата и время публикации')
+    title = models.CharField('Заголовок', max_length=TITLE_LENGTH)
+    excerpt = models.TextField('Начало текста')
+    image = models.ImageField(
+        'Изображение', upload_to='post_images', blank=True,
+        storage=post_image_storage
+    )
+    renditions_ready = models.BooleanField(
+        'Копии изображения готовы', default=False
+    )
+    image_width = models.PositiveIntegerField(
+        'Ширина изображения', null=True, blank=True
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота изображения', null=True, blank=True
+    )
+    category_slug = models.SlugField(
+        'Идентификатор категории', max_length=SLUG_LENGTH
+    )
+    category_title = models.CharField(
+        'Название категории', max_length=TITLE_LENGTH
+    )
+    location_name = models.CharField(
+        'Название места', max_length=TITLE_LENGTH, blank=True
+    )
+    author_username = models.CharField(
+        'Автор', max_length=USERNAME_LENGTH
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев', default=COMM_DEFAULT
+    )
+    updated_at = models.DateTimeField('Изменено', auto_now=True, db_index=True)
+
+    is_published = True
+    category_is_published = True
+
+    objects = CachedQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'id'), name='timeline_pub_date_idx'
+            ),
+        )
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def image_url(self):
+        return self.image.url if self.image else ''
+
+
+class Job(models.Model):
+    """Задание фоновой очереди (см. blog.jobs).
+
+    Выполненные задания удаляются, в таблице остаются ожидающие,
+    выполняемые и завершившиеся ошибкой. Задание после ошибки ждёт
+    повтора до run_after.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField('Задача', max_length=TITLE_LENGTH)
+    argument = models.CharField(
+        'Аргумент', max_length=TITLE_LENGTH, blank=True
+    )
+    status = models.CharField(
+        'Состояние', max_length=16, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    started_at = models.DateTimeField('Начато', null=True, blank=True)
+    run_after = models.DateTimeField('Не раньше', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'фоновое задание'
+        verbose_name_plural = 'Фоновые задания'
+        ordering = ('created_at', 'id')
+        indexes = (
+            models.Index(
+                fields=('status', 'created_at', 'id'), name='job_status_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.task}({self.argument})'
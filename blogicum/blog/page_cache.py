@@ -0,0 +1,128 @@
+import hashlib
+import re
+
+from django.conf import settings
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+
+from .cache import CacheCounter
+from .constance import PAGE_CACHE_TIMEOUT
+from .single_flight import FILLED, single_flight
+from .swr import stale_while_revalidate
+
+page_stats = CacheCounter('shared_page')
+
+HOLES = {}
+HOLE_RE = re.compile(r'<!--hole:(\w+)((?::\w*)*)-->')
+
+
+def hole(name):
+    """Регистрирует функцию, рендерящую персональный фрагмент страницы.
+
+    Функция получает запрос и строковые аргументы из заглушки
+    и возвращает HTML фрагмента для текущего пользователя.
+    """
+    def decorator(func):
+        HOLES[name] = func
+        return func
+    return decorator
+
+
+def hole_placeholder(name, *args):
+    """Возвращает заглушку, которая заменяется фрагментом при ответе."""
+    if name not in HOLES:
+        raise KeyError(f'Неизвестный фрагмент страницы: {name}')
+    return ''.join([f'<!--hole:{name}', *(f':{arg}' for arg in args), '-->'])
+
+
+def render_hole(request, name, *args):
+    """Рендерит персональный фрагмент для текущего пользователя."""
+    return HOLES[name](request, *(str(arg) for arg in args))
+
+
+def fill_holes(html, request):
+    """Заменяет заглушки общей страницы фрагментами пользователя."""
+    return HOLE_RE.sub(
+        lambda match: render_hole(
+            request, match[1], *match[2].split(':')[1:]
+        ),
+        html
+    )
+
+
+def shared_page_cache_enabled():
+    return getattr(settings, 'BLOG_SHARED_PAGE_CACHE', True)
+
+
+def _digest(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def get_shared_page(path, version, render, revalidate=False):
+    """Возвращает общий для всех пользователей HTML страницы.
+
+    render вызывается только при промахе кэша и должен вернуть HTML,
+    в котором персональные фрагменты заменены заглушками. Заполнения
+    одной страницы объединяются (см. blog.single_flight), поэтому
+    вместо свежей страницы может вернуться прежняя копия. При
+    revalidate прежняя копия отдаётся сразу, а свежая строится в фоне
+    (см. blog.swr). Возвращает FillResult.
+    """
+    fill = stale_while_revalidate if revalidate else single_flight
+    result = fill(
+        f'shared_page:{_digest(path)}', _digest(version), render,
+        PAGE_CACHE_TIMEOUT
+    )
+    if result.state == FILLED:
+        page_stats.miss()
+    else:
+        page_stats.hit()
+    return result
+
+
+@hole('header')
+def header_hole(request):
+    return render_to_string('includes/header.html', request=request)
+
+
+@hole('csrf_token')
+def csrf_token_hole(request):
+    return format_html(
+        '<input type="hidden" name="csrfmiddlewaretoken" value="{}">',
+        get_token(request)
+    )
+
+
+@hole('post_controls')
+def post_controls_hole(request, post_id, author_id):
+    return render_to_string(
+        'includes/post_controls.html',
+        {
+            'post_id': int(post_id),
+            'is_author': request.user.pk == int(author_id),
+        },
+        request
+    )
+
+
+@hole('comment_controls')
+def comment_controls_hole(request, post_id, comment_id, author_id):
+    return render_to_string(
+        'includes/comment_controls.html',
+        {
+            'post_id': int(post_id),
+            'comment_id': int(comment_id),
+            'is_author': request.user.pk == int(author_id),
+        },
+        request
+    )
+
+
+@hole('profile_controls')
+def profile_controls_hole(request, profile_id):
+    return render_to_string(
+        'includes/profile_controls.html',
+        {'is_owner': request.user.pk == int(profile_id)},
+        request
+    )
@@ -0,0 +1,267 @@
+import base64
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import BigIntegerField, Max, Q
+from django.utils.functional import cached_property
+
+from .cache import FEED_VERSION, CacheCounter, get_versions
+from .constance import COUNT_CACHE_TIMEOUT, EXACT_COUNT_LIMIT
+
+count_stats = CacheCounter('paginator_count')
+
+MAX_BIGINT = BigIntegerField.MAX_BIGINT
+
+
+def _count_timeout():
+    return getattr(settings, 'BLOG_COUNT_CACHE_TIMEOUT', COUNT_CACHE_TIMEOUT)
+
+
+def cached_count(queryset):
+    """Возвращает COUNT(*) queryset, кэшируя его по тексту запроса."""
+    sql, params = queryset.query.sql_with_params()
+    signature = hashlib.md5(f'{sql}{params!r}'.encode()).hexdigest()
+    version = get_versions([FEED_VERSION])[FEED_VERSION]
+    key = f'count:{signature}:{version}'
+    count = cache.get(key)
+    if count is None:
+        count_stats.miss()
+        count = queryset.count()
+        cache.set(key, count, _count_timeout())
+    else:
+        count_stats.hit()
+    return count
+
+
+def estimated_table_size(model):
+    """Грубая оценка числа строк таблицы по максимальному первичному ключу.
+
+    В SQLite MAX по первичному ключу берётся из индекса без полного
+    прохода по таблице; удалённые строки оценку лишь завышают.
+    """
+    key = f'table_size:{model._meta.db_table}'
+    size = cache.get(key)
+    if size is None:
+        size = model.objects.aggregate(size=Max('pk'))['size'] or 0
+        cache.set(key, size, _count_timeout())
+    return size
+
+
+def encode_cursor(values):
+    """Упаковывает значения ключа сортировки в непрозрачный токен."""
+    raw = json.dumps([str(value) for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, fields):
+    """Распаковывает токен курсора; для битого токена возвращает None."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if (
+        not isinstance(values, list) or len(values) != len(fields)
+        or not all(isinstance(value, str) for value in values)
+    ):
+        return None
+    decoded = []
+    try:
+        for field, value in zip(fields, values):
+            value = field.to_python(value)
+            # SQLite не задаёт полям диапазон целых, а число больше
+            # 64 бит роняет запрос.
+            if isinstance(value, int) and abs(value) > MAX_BIGINT:
+                return None
+            decoded.append(value)
+    except (ValidationError, TypeError, ValueError, OverflowError):
+        return None
+    if any(value is None for value in decoded):
+        return None
+    return decoded
+
+
+def _split_ordering(ordering):
+    return [
+        (name.lstrip('-'), name.startswith('-')) for name in ordering
+    ]
+
+
+def _cursor_values(obj, ordering):
+    return [getattr(obj, name) for name, _ in _split_ordering(ordering)]
+
+
+class CursorLinksMixin:
+    """Курсоры для ссылок на соседние страницы."""
+
+    @property
+    def next_cursor(self):
+        if not self.has_next() or not len(self):
+            return None
+        return self.paginator.cursor_for(self[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous() or not len(self):
+            return None
+        return self.paginator.cursor_for(self[0])
+
+
+class CursorPage(CursorLinksMixin):
+    """Страница курсорной пагинации.
+
+    Повторяет интерфейс ``Page``, которым пользуются шаблоны, но не знает
+    ни номера страницы, ни общего количества объектов.
+    """
+
+    number = None
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по полям сортировки queryset.
+
+    Вместо OFFSET страница выбирается условием на ключ сортировки
+    последнего (``after``) или первого (``before``) показанного объекта,
+    поэтому стоимость запроса не растёт с глубиной страницы.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = int(per_page)
+        self.ordering = ordering
+        opts = queryset.model._meta
+        self._fields = [
+            opts.get_field(name) for name, _ in _split_ordering(ordering)
+        ]
+
+    def cursor_for(self, obj):
+        return encode_cursor(_cursor_values(obj, self.ordering))
+
+    def _keyset_filter(self, values, forward):
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(
+            _split_ordering(self.ordering), values
+        ):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после/до курсора или первую страницу."""
+        fields = self._fields
+        after = decode_cursor(after, fields) if after else None
+        before = decode_cursor(before, fields) if before else None
+        limit = self.per_page + 1
+        if before is not None:
+            reverse_ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in self.ordering
+            ]
+            rows = list(
+                self.queryset.filter(
+                    self._keyset_filter(before, forward=False)
+                ).order_by(*reverse_ordering)[:limit]
+            )
+            has_previous = len(rows) > self.per_page
+            object_list = rows[:self.per_page][::-1]
+            return CursorPage(object_list, self, True, has_previous)
+        queryset = self.queryset
+        if after is not None:
+            queryset = queryset.filter(
+                self._keyset_filter(after, forward=True)
+            )
+        rows = list(queryset[:limit])
+        return CursorPage(
+            rows[:self.per_page], self, len(rows) > self.per_page,
+            after is not None
+        )
+
+
+class FeedPage(CursorLinksMixin, Page):
+    """Страница OFFSET-пагинации с курсорами для соседних страниц."""
+
+
+class FeedPaginator(Paginator):
+    """Пагинатор по номеру страницы, выдающий и курсорные ссылки.
+
+    Количество объектов берётся из кэша. Если таблица больше
+    ``BLOG_EXACT_COUNT_LIMIT`` строк, COUNT не выполняется вовсе:
+    наличие следующей страницы определяется по лишней (N+1) строке,
+    а ``count`` становится нижней оценкой.
+    """
+
+    def __init__(self, object_list, per_page, ordering, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.ordering = ordering
+        limit = getattr(settings, 'BLOG_EXACT_COUNT_LIMIT', EXACT_COUNT_LIMIT)
+        self.count_is_exact = (
+            estimated_table_size(object_list.model) <= limit
+        )
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+    def cursor_for(self, obj):
+        return encode_cursor(_cursor_values(obj, self.ordering))
+
+    def get_page(self, number):
+        if self.count_is_exact:
+            return super().get_page(number)
+        try:
+            return self.page(number)
+        except (PageNotAnInteger, EmptyPage):
+            return self.page(1)
+
+    def page(self, number):
+        if self.count_is_exact:
+            return super().page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть числом.')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1.')
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На этой странице нет результатов.')
+        self.count = bottom + len(rows)
+        return self._get_page(rows[:self.per_page], number, self)
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
@@ -0,0 +1,142 @@
+"""Кэш результатов запросов ORM.
+
+Кэширование включается явно: ``Category.objects.cached('имя')``.
+Ключ строится по SQL и параметрам запроса и версиям всех таблиц,
+упомянутых в SQL. Любая запись в такую таблицу (INSERT, UPDATE,
+DELETE — в том числе через QuerySet.update() и сырой SQL) повышает её
+версию. Версии ведутся только для таблиц, которые могут читать
+кэшируемые запросы (cached_tables): запись в сессии, очередь заданий
+и прочие таблицы не стоит лишних обращений к кэшу.
+"""
+import hashlib
+import re
+from functools import lru_cache
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+
+from .cache import CacheCounter, get_versions, invalidate
+from .constance import QUERY_CACHE_TIMEOUT
+
+QUERY_NAMES_KEY = 'stats:query_names'
+WRITE_RE = re.compile(
+    r'^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+"?(\w+)"?',
+    re.IGNORECASE
+)
+IDENTIFIER_RE = re.compile(r'"(\w+)"')
+
+
+def table_tag(table):
+    return f'table:{table}'
+
+
+@lru_cache(maxsize=None)
+def cached_tables():
+    """Таблицы моделей с CachedQuerySet и моделей, на которые они ссылаются.
+
+    Связанные таблицы нужны для select_related и запросов вроде
+    CachedQuerySet(User).
+    """
+    models = [
+        model for model in apps.get_models()
+        if issubclass(model._default_manager._queryset_class, CachedQuerySet)
+    ]
+    return frozenset(
+        related._meta.db_table
+        for model in models
+        for related in (
+            model,
+            *(
+                field.related_model for field in model._meta.concrete_fields
+                if field.is_relation
+            ),
+        )
+    )
+
+
+def track_writes(execute, sql, params, many, context):
+    """Обёртка execute, повышающая версию таблицы после записи в неё."""
+    result = execute(sql, params, many, context)
+    match = WRITE_RE.match(sql)
+    if match and match[1] in cached_tables():
+        invalidate([table_tag(match[1])])
+    return result
+
+
+def install_write_tracker(connection, **kwargs):
+    if track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_writes)
+
+
+def query_counter(name):
+    """Счётчик попаданий запроса; имя запоминается для cache_stats."""
+    counter = CacheCounter.registry.get(f'query:{name}')
+    if counter is None:
+        counter = CacheCounter(f'query:{name}')
+        names = cache.get(QUERY_NAMES_KEY, set())
+        if name not in names:
+            cache.set(QUERY_NAMES_KEY, names | {name}, None)
+    return counter
+
+
+def load_query_counters():
+    """Регистрирует счётчики запросов, кэшированных другими процессами."""
+    for name in cache.get(QUERY_NAMES_KEY, ()):
+        query_counter(name)
+
+
+class CachedQuerySet(QuerySet):
+    """QuerySet, результат которого можно взять из кэша."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_name = None
+
+    def cached(self, name):
+        """Включает кэширование результата под именем ``name``."""
+        clone = self._chain()
+        clone._cache_name = name
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_name = self._cache_name
+        return clone
+
+    def _cache_key(self):
+        sql, params = self.query.sql_with_params()
+        tables = sorted(
+            set(IDENTIFIER_RE.findall(sql)) & cached_tables()
+        )
+        tags = [table_tag(table) for table in tables]
+        versions = get_versions(tags)
+        digest = hashlib.md5(
+            repr((sql, params, [versions[tag] for tag in tags])).encode()
+        ).hexdigest()
+        return f'query:{self._cache_name}:{digest}'
+
+    def _fetch_all(self):
+        if self._cache_name is not None and self._result_cache is None:
+            try:
+                key = self._cache_key()
+            except EmptyResultSet:
+                return super()._fetch_all()
+            counter = query_counter(self._cache_name)
+            result = cache.get(key)
+            if result is None:
+                counter.miss()
+                result = list(self._iterable_class(self))
+                cache.set(key, result, QUERY_CACHE_TIMEOUT)
+            else:
+                counter.hit()
+            self._result_cache = result
+        super()._fetch_all()
+
+
+connection_created.connect(install_write_tracker)
+for _connection in connections.all():
+    install_write_tracker(_connection)
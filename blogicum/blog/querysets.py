@@ -0,0 +1,29 @@
+from .models import Post
+from .visibility import visibility_cutoff
+
+FEED_ORDERING = ('-pub_date', '-id')
+COMMENT_ORDERING = ('created_at', 'id')
+
+
+def published_posts(queryset=None):
+    """Возвращает посты, видимые всем читателям."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    return queryset.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__lte=visibility_cutoff()
+    )
+
+
+def feed_queryset(queryset=None):
+    """Готовит queryset постов для вывода карточками.
+
+    Автор загружается тем же запросом, а категории и места карточкам
+    подставляет двухуровневый кэш (см. blog.local_cache).
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    return queryset.select_related('author', 'image_blob').order_by(
+        *FEED_ORDERING
+    )
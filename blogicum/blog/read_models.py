@@ -0,0 +1,121 @@
+"""Лёгкие объекты для вывода постов карточками.
+
+Для карточки не нужен полноценный экземпляр Post с автором, категорией
+и местом: достаточно нескольких столбцов. card_queryset выбирает только
+их через values(); текст поста не читается, отрывок сохранён заранее.
+Категории и места подставляются из двухуровневого кэша
+(см. blog.local_cache).
+"""
+from django.db.models import F
+from django.db.models.query import BaseIterable, ValuesIterable
+
+from .local_cache import lookup_table
+from .models import Category, Location, Post
+from .querysets import FEED_ORDERING
+
+CARD_COLUMNS = (
+    'id', 'title', 'pub_date', 'image', 'renditions_ready', 'excerpt',
+    'is_published', 'comment_count', 'category_id', 'location_id',
+)
+
+
+class PostCard:
+    """Неизменяемые данные карточки поста.
+
+    Атрибуты совпадают с теми, которые шаблон карточки читает у Post
+    и TimelineEntry; image — имя файла, а не FieldFile.
+    """
+
+    __slots__ = (
+        'id', 'title', 'pub_date', 'image', 'image_url', 'image_width',
+        'image_height', 'renditions_ready', 'excerpt', 'is_published',
+        'comment_count', 'author_username', 'category_slug', 'category_title',
+        'category_is_published', 'location_name',
+    )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PostCard нельзя изменить.')
+
+    def __delattr__(self, name):
+        raise AttributeError('PostCard нельзя изменить.')
+
+    def __reduce__(self):
+        return _restore_card, (self._values(),)
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if not isinstance(other, PostCard):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def __repr__(self):
+        return f'<PostCard {self.id}: {self.title}>'
+
+    @classmethod
+    def from_row(cls, row, categories, locations):
+        """Собирает карточку из строки card_queryset."""
+        category = categories.get(row['category_id'])
+        location = locations.get(row['location_id'])
+        image = row['image']
+        return cls(
+            id=row['id'],
+            title=row['title'],
+            pub_date=row['pub_date'],
+            image=image,
+            image_url=Post.image.field.storage.url(image) if image else '',
+            image_width=row['image_width'],
+            image_height=row['image_height'],
+            renditions_ready=row['renditions_ready'],
+            excerpt=row['excerpt'],
+            is_published=row['is_published'],
+            comment_count=row['comment_count'],
+            author_username=row['author_username'],
+            category_slug=category and category.slug,
+            category_title=category and category.title,
+            category_is_published=(
+                category is not None and category.is_published
+            ),
+            location_name=(
+                location.name if location and location.is_published else ''
+            ),
+        )
+
+
+def _restore_card(values):
+    return PostCard(**dict(zip(PostCard.__slots__, values)))
+
+
+class PostCardIterable(BaseIterable):
+    """Отдаёт PostCard вместо словарей values()."""
+
+    def __iter__(self):
+        rows = list(ValuesIterable(self.queryset))
+        if not rows:
+            return
+        categories = lookup_table(Category)
+        locations = lookup_table(Location)
+        for row in rows:
+            yield PostCard.from_row(row, categories, locations)
+
+
+def card_queryset(queryset=None):
+    """Готовит queryset постов, отдающий PostCard в порядке ленты."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    queryset = queryset.order_by(*FEED_ORDERING).values(
+        *CARD_COLUMNS,
+        author_username=F('author__username'),
+        image_width=F('image_blob__width'),
+        image_height=F('image_blob__height'),
+    )
+    queryset._iterable_class = PostCardIterable
+    return queryset
@@ -0,0 +1,229 @@
+"""Уменьшенные копии изображений постов.
+
+Для каждого загруженного изображения строятся копии, которые лежат
+рядом с оригиналом ``post_images/photo.jpg``:
+
+* ``photo.card.jpg`` и ``photo.detail.jpg`` — копии фиксированной
+  ширины в формате оригинала для браузеров без WebP;
+* ``photo.w320.webp``, ``photo.w640.webp``, … — копии в WebP для
+  srcset шириной из RESPONSIVE_WIDTHS, но не шире оригинала.
+
+Изображения не увеличиваются. Размеры копий вычисляются по размеру
+оригинала, сохранённому при загрузке (см. ImageBlob), поэтому шаблону
+не нужно открывать ни оригинал, ни копии.
+"""
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .constance import (
+    CARD_IMAGE_WIDTH, DETAIL_IMAGE_WIDTH, RENDITION_QUALITY,
+    RESPONSIVE_WIDTHS
+)
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    'card': CARD_IMAGE_WIDTH,
+    'detail': DETAIL_IMAGE_WIDTH,
+}
+# Карточка и страница поста не шире 40rem: на узком экране изображение
+# занимает всю ширину окна.
+PICTURE_SIZES = '(max-width: 640px) 100vw, 640px'
+EXIF_ORIENTATION = 0x0112
+# Значения ориентации, при которых ширина и высота меняются местами.
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+# Форматы, из оригиналов которых убираются метаданные, и параметры
+# записи: JPEG сохраняется с таблицами квантования оригинала.
+METADATA_FORMATS = {
+    'JPEG': {'quality': 'keep'},
+    'PNG': {},
+}
+
+
+def rendition_width(rendition):
+    return getattr(
+        settings, f'BLOG_{rendition.upper()}_IMAGE_WIDTH',
+        RENDITIONS[rendition]
+    )
+
+
+def responsive_widths(original_width):
+    """Ширины WebP-копий изображения шириной original_width."""
+    widths = getattr(settings, 'BLOG_RESPONSIVE_WIDTHS', RESPONSIVE_WIDTHS)
+    smaller = [width for width in widths if width < original_width]
+    return smaller + [min(original_width, max(widths))]
+
+
+def scaled_size(size, width):
+    """Размер изображения size, уменьшенного до ширины width."""
+    original_width, original_height = size
+    if original_width <= width:
+        return size
+    return width, max(1, round(original_height * width / original_width))
+
+
+def rendition_name(name, rendition):
+    """Имя файла копии рядом с оригиналом."""
+    root, ext = os.path.splitext(name)
+    return f'{root}.{rendition}{ext}'
+
+
+def webp_name(name, width):
+    """Имя WebP-копии шириной width рядом с оригиналом."""
+    root, _ = os.path.splitext(name)
+    return f'{root}.w{width}.webp'
+
+
+def describe_image(file):
+    """Хэш содержимого, размер после поворота по EXIF и объём файла.
+
+    Файл читается один раз для хэша, у изображения разбирается только
+    заголовок. Возвращает None, если файл не читается как изображение.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in file.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    try:
+        file.seek(0)
+        image = Image.open(file)
+        width, height = image.size
+        orientation = image.getexif().get(EXIF_ORIENTATION)
+    except (OSError, UnidentifiedImageError):
+        return None
+    finally:
+        file.seek(0)
+    if orientation in ROTATED_ORIENTATIONS:
+        width, height = height, width
+    return {
+        'sha256': digest.hexdigest(),
+        'width': width,
+        'height': height,
+        'size': size,
+    }
+
+
+def strip_metadata(file):
+    """Копия изображения без EXIF, кроме ориентации.
+
+    В EXIF фотографий бывают координаты съёмки и сведения об авторе,
+    которые не должны попадать в опубликованный файл. Возвращает None,
+    если убирать нечего или формат не из METADATA_FORMATS.
+    """
+    try:
+        file.seek(0)
+        image = Image.open(file)
+        exif = image.getexif()
+        if image.format not in METADATA_FORMATS or not (
+            set(exif) - {EXIF_ORIENTATION}
+        ):
+            return None
+        kept = Image.Exif()
+        if EXIF_ORIENTATION in exif:
+            kept[EXIF_ORIENTATION] = exif[EXIF_ORIENTATION]
+        buffer = BytesIO()
+        image.save(
+            buffer, image.format, exif=kept.tobytes(),
+            **METADATA_FORMATS[image.format]
+        )
+    except (OSError, UnidentifiedImageError):
+        return None
+    finally:
+        file.seek(0)
+    return ContentFile(buffer.getvalue(), name=file.name)
+
+
+def picture(name, size, ready, rendition, storage=default_storage):
+    """Данные для разметки <picture> изображения поста.
+
+    size — сохранённый размер оригинала или None, если он неизвестен.
+    Пока копии не готовы, выводится оригинал без WebP-источников.
+    """
+    if not ready or size is None:
+        return {'src': storage.url(name), 'size': size, 'srcset': ''}
+    return {
+        'src': storage.url(rendition_name(name, rendition)),
+        'size': scaled_size(size, rendition_width(rendition)),
+        'srcset': ', '.join(
+            f'{storage.url(webp_name(name, width))} {width}w'
+            for width in responsive_widths(size[0])
+        ),
+    }
+
+
+def resize_to_width(image, width):
+    size = scaled_size(image.size, width)
+    if size == image.size:
+        return image.copy()
+    return image.resize(size, Image.LANCZOS)
+
+
+def encode(image, image_format):
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    elif image_format == 'WEBP' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    buffer = BytesIO()
+    options = {'optimize': True}
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = RENDITION_QUALITY
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def rendition_names(name, width):
+    """Имена всех копий изображения name шириной width."""
+    return [rendition_name(name, rendition) for rendition in RENDITIONS] + [
+        webp_name(name, width) for width in responsive_widths(width)
+    ]
+
+
+def _save(storage, name, content):
+    if storage.exists(name):
+        storage.delete(name)
+    # Хранилище с адресацией по содержимому переименовало бы копию.
+    save = getattr(storage, 'save_as', storage.save)
+    return save(name, ContentFile(content))
+
+
+def make_renditions(name, storage=default_storage):
+    """Строит и сохраняет все копии изображения ``name``.
+
+    Существующие копии перезаписываются. Возвращает имена сохранённых
+    файлов; если файл не читается как изображение, копии не строятся.
+    """
+    try:
+        with storage.open(name) as original:
+            image = Image.open(original)
+            image_format = image.format
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, UnidentifiedImageError):
+        logger.warning('Не удалось прочитать изображение %s', name)
+        return []
+    saved = [
+        _save(
+            storage, rendition_name(name, rendition),
+            encode(
+                resize_to_width(image, rendition_width(rendition)),
+                image_format
+            )
+        )
+        for rendition in RENDITIONS
+    ]
+    saved += [
+        _save(
+            storage, webp_name(name, width),
+            encode(resize_to_width(image, width), 'WEBP')
+        )
+        for width in responsive_widths(image.width)
+    ]
+    return saved
@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_delete
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Category, Comment, Location, Post, TimelineEntry
+from .timeline import refresh_timeline
+
+User = get_user_model()
+
+
+def posts_changed(post_ids):
+    """Обновляет строки ленты изменившихся постов.
+
+    Кэши сбрасывает blog.invalidation по тем же сигналам.
+    """
+    refresh_timeline(post_ids)
+
+
+def change_comment_count(post_id, delta):
+    """Атомарно изменяет счётчик комментариев поста и его строки ленты.
+
+    Заодно обновляется updated_at: от него зависят валидаторы
+    условных GET-запросов.
+    """
+    for model in (Post, TimelineEntry):
+        rows = model.objects.filter(pk=post_id)
+        if delta < 0:
+            rows = rows.filter(comment_count__gte=-delta)
+        rows.update(
+            comment_count=F('comment_count') + delta,
+            updated_at=timezone.now()
+        )
+
+
+def touch_post(post_id):
+    """Отмечает пост изменённым после правки его комментария."""
+    Post.objects.filter(pk=post_id).update(updated_at=timezone.now())
+
+
+@receiver(post_init, sender=Comment)
+def remember_comment_post(sender, instance, **kwargs):
+    """Запоминает пост, к которому комментарий был привязан при загрузке."""
+    instance._initial_post_id = instance.post_id
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw, **kwargs):
+    """Учитывает новый или перенесённый в другой пост комментарий."""
+    if raw:
+        return
+    if created:
+        change_comment_count(instance.post_id, 1)
+    elif instance._initial_post_id != instance.post_id:
+        change_comment_count(instance._initial_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+    else:
+        touch_post(instance.post_id)
+    instance._initial_post_id = instance.post_id
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    """Уменьшает счётчик поста при удалении комментария."""
+    change_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def update_post_timeline(sender, instance, raw, **kwargs):
+    """Обновляет строку ленты и карточку сохранённого поста."""
+    if not raw:
+        posts_changed([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_timeline(sender, instance, **kwargs):
+    """Убирает удалённый пост из ленты."""
+    TimelineEntry.objects.filter(pk=instance.pk).delete()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Location)
+def update_related_timeline(sender, instance, raw, **kwargs):
+    """Обновляет ленту для постов изменённой категории или места."""
+    if not raw:
+        posts_changed(
+            Post.objects.filter(
+                **{sender._meta.model_name: instance}
+            ).values_list('pk', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Location)
+def remember_related_posts(sender, instance, **kwargs):
+    """Запоминает посты, которые потеряют категорию или место."""
+    instance._timeline_post_ids = list(
+        Post.objects.filter(
+            **{sender._meta.model_name: instance}
+        ).values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Location)
+def update_orphaned_timeline(sender, instance, **kwargs):
+    """Обновляет ленту для постов удалённой категории или места."""
+    posts_changed(instance._timeline_post_ids)
+
+
+@receiver(post_save, sender=User)
+def update_author_timeline(sender, instance, raw, update_fields, **kwargs):
+    """Обновляет имя автора в ленте после изменения пользователя."""
+    if raw or (update_fields is not None and 'username' not in update_fields):
+        return
+    posts_changed(
+        Post.objects.filter(author=instance).values_list('pk', flat=True)
+    )
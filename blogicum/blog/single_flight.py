@@ -0,0 +1,101 @@
+"""Объединение одновременных заполнений кэша.
+
+Значение хранится под постоянным ключом вместе с версией, для которой
+оно построено, и временем построения. Когда версия меняется,
+перестраивает значение только тот процесс, который первым взял
+блокировку в общем кэше; остальные отдают прежнюю копию или недолго
+ждут, пока новая появится.
+"""
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from .cache import CacheCounter
+from .conf import setting
+from .constance import (
+    FILL_LOCK_TIMEOUT, FILL_POLL_INTERVAL, FILL_WAIT_TIMEOUT
+)
+
+HIT = 'hit'
+FILLED = 'filled'
+WAITED = 'waited'
+STALE = 'stale'
+
+FillResult = namedtuple('FillResult', ('value', 'state'))
+
+coalesce_stats = CacheCounter('single_flight')
+
+
+def _lock_key(key, version):
+    return f'lock:{key}:{version}'
+
+
+def acquire_fill_lock(key, version):
+    """Пытается стать единственным, кто заполняет ключ для версии."""
+    return cache.add(
+        _lock_key(key, version), True,
+        setting('FILL_LOCK_TIMEOUT', FILL_LOCK_TIMEOUT)
+    )
+
+
+def release_fill_lock(key, version):
+    cache.delete(_lock_key(key, version))
+
+
+def store(key, version, value, timeout):
+    cache.set(key, (version, value, time.time()), timeout)
+
+
+def fill_locked(key, version, fill, timeout):
+    """Строит значение под блокировкой и сохраняет его с версией."""
+    try:
+        value = fill()
+        store(key, version, value, timeout)
+    finally:
+        release_fill_lock(key, version)
+    return value
+
+
+def wait_for_fill(key, version):
+    """Ждёт, пока другой процесс сохранит значение для версии."""
+    deadline = time.monotonic() + setting(
+        'FILL_WAIT_TIMEOUT', FILL_WAIT_TIMEOUT
+    )
+    interval = setting('FILL_POLL_INTERVAL', FILL_POLL_INTERVAL)
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        entry = cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry
+    return None
+
+
+def single_flight(key, version, fill, timeout, max_stale=None):
+    """Возвращает значение ключа для версии, заполняя его не более раза.
+
+    Копия старше max_stale секунд не используется даже при совпадении
+    версии. Если значение для версии уже строит другой процесс, отдаётся
+    прежняя копия, а если её нет — процесс ждёт до FILL_WAIT_TIMEOUT
+    и, не дождавшись, строит значение сам.
+    """
+    entry = cache.get(key)
+    if (
+        entry is not None and max_stale is not None
+        and time.time() - entry[2] >= max_stale
+    ):
+        entry = None
+    if entry is not None and entry[0] == version:
+        return FillResult(entry[1], HIT)
+    if acquire_fill_lock(key, version):
+        coalesce_stats.miss()
+        return FillResult(fill_locked(key, version, fill, timeout), FILLED)
+    coalesce_stats.hit()
+    if entry is not None:
+        return FillResult(entry[1], STALE)
+    entry = wait_for_fill(key, version)
+    if entry is not None:
+        return FillResult(entry[1], WAITED)
+    value = fill()
+    store(key, version, value, timeout)
+    return FillResult(value, FILLED)
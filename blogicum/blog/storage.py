@@ -0,0 +1,91 @@
+"""Хранилище изображений постов с адресацией по содержимому.
+
+Файл называется SHA-256 своего содержимого и лежит в каталогах по
+первым символам хэша: ``post_images/3a/7f/3a7f….jpg``. Повторная
+загрузка того же файла не создаёт копию, а возвращает имя уже
+сохранённого. Содержимое по такому имени не меняется, поэтому файлы
+можно отдавать с кэшированием без срока.
+
+Копии изображения (см. blog.renditions) называются по оригиналу
+и сохраняются под переданным именем через save_as. Учёт ссылок
+на файлы и удаление ненужных — см. ImageBlob и blog.tasks.
+"""
+import hashlib
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from PIL import Image, UnidentifiedImageError
+
+from .constance import IMAGE_SHARD_DEPTH, IMAGE_SHARD_WIDTH
+
+# Расширение файла по формату, который определил Pillow.
+IMAGE_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'WEBP': '.webp',
+    'BMP': '.bmp',
+    'TIFF': '.tif',
+}
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def shards(digest):
+    return [
+        digest[index * IMAGE_SHARD_WIDTH:(index + 1) * IMAGE_SHARD_WIDTH]
+        for index in range(IMAGE_SHARD_DEPTH)
+    ]
+
+
+def image_extension(content, default):
+    """Расширение по формату изображения, а не по имени загрузки.
+
+    Иначе одни и те же байты, загруженные как .jpg и .jpeg, легли бы
+    в два файла, а учёт ссылок (ImageBlob) знал бы только об одном.
+    Для нераспознанного формата возвращается default.
+    """
+    try:
+        content.seek(0)
+        image_format = Image.open(content).format
+    except (OSError, UnidentifiedImageError):
+        return default
+    finally:
+        content.seek(0)
+    return IMAGE_EXTENSIONS.get(image_format, default)
+
+
+def hashed_name(directory, digest, ext):
+    """Имя файла с содержимым digest в каталоге directory."""
+    return posixpath.join(directory, *shards(digest), digest + ext.lower())
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, которое называет файлы хэшем содержимого."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        directory, basename = posixpath.split(name)
+        ext = image_extension(content, posixpath.splitext(basename)[1])
+        name = hashed_name(directory, content_hash(content), ext)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+    def save_as(self, name, content, max_length=None):
+        """Сохраняет файл под переданным именем, без хэша в имени."""
+        return super().save(name, content, max_length)
+
+
+post_image_storage = ContentAddressedStorage()
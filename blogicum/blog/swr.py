@@ -0,0 +1,71 @@
+"""Отдача устаревших страниц с фоновым обновлением.
+
+Запись кэша живёт в двух сроках. До мягкого срока (SWR_SOFT_TTL)
+запись свежая, если её версия совпадает с текущей. После мягкого срока
+или смены версии, но до жёсткого срока (SWR_HARD_TTL), запись отдаётся
+сразу, а обновление ставится в пул потоков. Старше жёсткого срока
+запись не отдаётся, и значение строится синхронно (single_flight).
+"""
+import time
+
+from django.core.cache import cache
+from django.db import connections
+
+from .cache import CacheMetric
+from .conf import setting
+from .constance import REFRESH_WORKERS, SWR_HARD_TTL, SWR_SOFT_TTL
+from .executors import LazyExecutor
+from .single_flight import (
+    HIT, STALE, FillResult, acquire_fill_lock, fill_locked, single_flight
+)
+
+refresh_latency = CacheMetric('swr_refresh_latency')
+staleness = CacheMetric('swr_staleness')
+
+executor = LazyExecutor('REFRESH_WORKERS', REFRESH_WORKERS, 'blog-refresh')
+
+
+def refresh(key, version, fill, timeout):
+    """Перестраивает запись и замеряет длительность обновления."""
+    started = time.monotonic()
+    try:
+        fill_locked(key, version, fill, timeout)
+    finally:
+        refresh_latency.observe(time.monotonic() - started)
+
+
+def _refresh_in_thread(key, version, fill, timeout):
+    try:
+        refresh(key, version, fill, timeout)
+    finally:
+        connections.close_all()
+
+
+def schedule_refresh(key, version, fill, timeout):
+    """Ставит обновление записи в фон, если его ещё никто не начал.
+
+    При BLOG_REFRESH_WORKERS = 0 обновление выполняется сразу.
+    """
+    if not acquire_fill_lock(key, version):
+        return
+    if not executor.workers:
+        refresh(key, version, fill, timeout)
+        return
+    executor.submit(_refresh_in_thread, key, version, fill, timeout)
+
+
+def stale_while_revalidate(key, version, fill, timeout):
+    """Возвращает FillResult, по возможности не дожидаясь перестройки."""
+    soft_ttl = setting('SWR_SOFT_TTL', SWR_SOFT_TTL)
+    hard_ttl = setting('SWR_HARD_TTL', SWR_HARD_TTL)
+    entry = cache.get(key)
+    if entry is not None:
+        entry_version, value, built_at = entry
+        age = time.time() - built_at
+        if entry_version == version and age < soft_ttl:
+            return FillResult(value, HIT)
+        if age < hard_ttl:
+            staleness.observe(age)
+            schedule_refresh(key, version, fill, timeout)
+            return FillResult(value, STALE)
+    return single_flight(key, version, fill, timeout, max_stale=hard_ttl)
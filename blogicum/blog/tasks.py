@@ -0,0 +1,122 @@
+"""Фоновые задания блога."""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate
+from .invalidation import related_posts, tags_for_posts
+from .jobs import enqueue, task
+from .models import ImageBlob, Job, Post
+from .renditions import make_renditions, rendition_names
+from .timeline import refresh_timeline
+
+POST_IMAGE = 'post_image'
+COLLECT_IMAGES = 'collect_images'
+
+
+def mark_renditions_ready(name):
+    """Отмечает готовыми копии изображения у всех его постов.
+
+    Посты, у которых изображение уже сменилось, не затрагиваются.
+    """
+    post_ids = list(
+        Post.objects.filter(image=name, renditions_ready=False).values_list(
+            'pk', flat=True
+        )
+    )
+    if not post_ids:
+        return
+    Post.objects.filter(pk__in=post_ids, image=name).update(
+        renditions_ready=True, updated_at=timezone.now()
+    )
+    invalidate(tags_for_posts(related_posts(pk__in=post_ids)))
+    refresh_timeline(post_ids)
+
+
+@task(POST_IMAGE)
+def process_post_image(post_id):
+    """Строит копии изображения поста и переключает страницы на них."""
+    name = Post.objects.filter(pk=post_id).values_list(
+        'image', flat=True
+    ).first()
+    if not name:
+        return
+    # Тот же файл уже загружали к другому посту: копии есть.
+    if Post.objects.filter(image=name, renditions_ready=True).exists():
+        mark_renditions_ready(name)
+        return
+    if not make_renditions(name, Post.image.field.storage):
+        raise ValueError(f'Не удалось обработать изображение {name}.')
+    mark_renditions_ready(name)
+
+
+@receiver(post_save, sender=Post)
+def queue_post_image(sender, instance, raw, **kwargs):
+    """Ставит в очередь обработку только что загруженного изображения."""
+    if not raw and getattr(instance, '_image_uploaded', False):
+        enqueue(POST_IMAGE, instance.pk)
+
+
+@task(COLLECT_IMAGES)
+def collect_images(argument=''):
+    """Удаляет файлы изображений, на которые не ссылается ни один пост.
+
+    Сведения об изображении остаются, а имя файла стирается условным
+    запросом раньше удаления: если на изображение тем временем снова
+    сослался пост, файлы не трогаются. Имя стирается и файлы удаляются
+    в одной транзакции, поэтому пост, который снова ссылается на
+    изображение, фиксируется только после удаления и записывает файл
+    заново (см. Post.save).
+    """
+    storage = Post.image.field.storage
+    unused = ImageBlob.objects.filter(
+        ref_count=0, posts__isnull=True
+    ).exclude(name='')
+    for blob in list(unused):
+        with transaction.atomic():
+            if not unused.filter(pk=blob.pk).update(name=''):
+                continue
+            for name in (blob.name, *rendition_names(blob.name, blob.width)):
+                storage.delete(name)
+
+
+def release_image(blob_id):
+    """Снимает ссылку поста на изображение и планирует сборку файлов."""
+    ImageBlob.change_refs(blob_id, -1)
+    if not Job.objects.filter(
+        task=COLLECT_IMAGES, status=Job.PENDING
+    ).exists():
+        enqueue(COLLECT_IMAGES)
+
+
+@receiver(post_init, sender=Post)
+def remember_image_blob(sender, instance, **kwargs):
+    """Запоминает изображение, с которым пост был загружен.
+
+    Отложенное поле не читается, чтобы не делать лишний запрос.
+    """
+    instance._initial_image_blob_id = instance.__dict__.get('image_blob_id')
+
+
+@receiver(post_save, sender=Post)
+def count_image_refs(sender, instance, raw, **kwargs):
+    """Учитывает в счётчиках ссылок новое или заменённое изображение."""
+    blob_id = instance.__dict__.get('image_blob_id')
+    if raw or blob_id == instance._initial_image_blob_id:
+        return
+    if blob_id:
+        ImageBlob.change_refs(blob_id, 1, instance.image.name)
+    if instance._initial_image_blob_id:
+        release_image(instance._initial_image_blob_id)
+    instance._initial_image_blob_id = blob_id
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_post_image(sender, instance, **kwargs):
+    """Снимает ссылку удалённого поста на изображение."""
+    blob_id = instance.__dict__.get('image_blob_id')
+    if blob_id:
+        release_image(blob_id)
+    # Сохранённый заново экземпляр снова сошлётся на изображение.
+    instance._initial_image_blob_id = None
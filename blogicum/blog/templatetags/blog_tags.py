@@ -0,0 +1,46 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog.cards import render_post_cards
+from blog.models import Post
+from blog.page_cache import hole_placeholder, render_hole
+from blog.renditions import PICTURE_SIZES, picture
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Возвращает список HTML карточек постов из кэша фрагментов."""
+    return render_post_cards(posts)
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, *args):
+    """Выводит персональный фрагмент страницы.
+
+    На странице, которая кэшируется для всех пользователей, вместо
+    фрагмента остаётся заглушка: её заполняет fill_holes при ответе.
+    """
+    if context.get('shared_page'):
+        return mark_safe(hole_placeholder(name, *args))
+    return mark_safe(render_hole(context['request'], name, *args))
+
+
+@register.inclusion_tag('includes/picture.html')
+def post_picture(post, rendition, lazy=True):
+    """Выводит изображение поста с WebP-копиями разной ширины.
+
+    post может быть Post, TimelineEntry или PostCard: у последнего
+    image — уже имя файла.
+    """
+    name = getattr(post.image, 'name', post.image)
+    size = (post.image_width, post.image_height) if post.image_width else None
+    return {
+        'picture': picture(
+            name, size, post.renditions_ready, rendition,
+            Post.image.field.storage
+        ),
+        'sizes': PICTURE_SIZES,
+        'lazy': lazy,
+    }
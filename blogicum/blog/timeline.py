@@ -0,0 +1,57 @@
+from django.db import transaction
+
+from .models import Post, TimelineEntry
+
+
+def timeline_entry_for(post):
+    """Собирает строку ленты по посту с загруженными связями."""
+    return TimelineEntry(
+        id=post.id,
+        pub_date=post.pub_date,
+        title=post.title,
+        excerpt=post.excerpt,
+        image=post.image.name,
+        renditions_ready=post.renditions_ready,
+        image_width=post.image_width,
+        image_height=post.image_height,
+        category_slug=post.category_slug,
+        category_title=post.category_title,
+        location_name=post.location_name,
+        author_username=post.author_username,
+        comment_count=post.comment_count,
+    )
+
+
+def refresh_timeline(post_ids):
+    """Пересобирает строки ленты для указанных постов.
+
+    Видимые посты (опубликованные, в опубликованной категории)
+    записываются заново, остальные из ленты удаляются.
+    Дата публикации здесь не проверяется: отложенные посты лежат
+    в ленте заранее и отсекаются условием на pub_date при чтении.
+    """
+    post_ids = list(post_ids)
+    if not post_ids:
+        return
+    posts = Post.objects.filter(
+        pk__in=post_ids,
+        is_published=True,
+        category__is_published=True
+    ).select_related('author', 'category', 'location', 'image_blob')
+    entries = [timeline_entry_for(post) for post in posts]
+    with transaction.atomic():
+        TimelineEntry.objects.filter(pk__in=post_ids).delete()
+        TimelineEntry.objects.bulk_create(entries)
+
+
+def rebuild_timeline(chunk_size):
+    """Полностью пересобирает ленту порциями по chunk_size постов."""
+    TimelineEntry.objects.all().delete()
+    post_ids = Post.objects.order_by('pk').values_list('pk', flat=True)
+    chunk = []
+    for post_id in post_ids.iterator():
+        chunk.append(post_id)
+        if len(chunk) == chunk_size:
+            refresh_timeline(chunk)
+            chunk = []
+    refresh_timeline(chunk)
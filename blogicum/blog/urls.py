@@ -25,6 +25,8 @@ urlpatterns = [
 
     path('posts/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
+    path('posts/<int:post_id>/comments/',
+         views.comment_list, name='comment_list'),
     path(
         'posts/<int:post_id>/edit_comment/<int:comment_id>/',
         views.edit_comment,
@@ -9,11 +9,12 @@ from django.views.generic import (
     UpdateView,
     DeleteView
 )
-from django.db.models import Count
-from django.http import Http404
+from django.db import transaction
+from django.db.models import Max
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils import timezone
 from django.urls import reverse_lazy, reverse
+from django.utils.safestring import mark_safe
 
 from .constance import PAGINATE_COUNT
 from .check_comments import (
@@ -22,8 +23,22 @@ from .check_comments import (
     get_post
 )
 from .forms import RegisterForm, ProfileForm, CommentForm, PostForm
-from .mixins import PostCheckMixin, PostMixin, paginate_queryset
-from .models import Post, Category
+from .mixins import (
+    PostCheckMixin,
+    PostMixin,
+    SharedPageMixin,
+    paginate_queryset
+)
+from .cache import tag_versions
+from .comment_cache import render_comment_page
+from .invalidation import category_tag, post_tag, profile_tag
+from .local_cache import attach_lookups, category_by_slug
+from .models import Post, Category, TimelineEntry
+from .page_cache import fill_holes
+from .query_cache import CachedQuerySet
+from .read_models import card_queryset
+from .querysets import feed_queryset, published_posts
+from .visibility import visibility_cutoff
 
 
 @login_required
@@ -35,10 +50,21 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.post = post
         comment.author = request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('blog:post_detail', post_id)
 
 
+@login_required
+def comment_list(request, post_id):
+    """Возвращает фрагмент со следующей порцией комментариев поста."""
+    post = get_post(post_id)
+    if not post.is_published and request.user != post.author:
+        raise Http404('Пост недоступен.')
+    html = render_comment_page(post, request.GET.get('after'))
+    return HttpResponse(fill_holes(html, request))
+
+
 @login_required
 def edit_comment(request, post_id, comment_id):
     """Редактирует комментарий."""
@@ -71,7 +97,7 @@ def delete_comment(request, post_id, comment_id):
 @login_required
 def post_list(request):
     """Список всех постов с количеством комментариев."""
-    posts = Post.objects.annotate(comment_count=Count('comments'))
+    posts = feed_queryset()
 
     return render(request, 'includes/post_card.html', {'posts': posts})
 
@@ -88,22 +114,37 @@ class RegistrationView(FormView):
         return super().form_valid(form)
 
 
-class ProfileDetailView(DetailView):
+class ProfileDetailView(SharedPageMixin, DetailView):
     """Отображение страницы профиля."""
 
     model = User
     template_name = 'blog/profile.html'
     context_object_name = 'profile'
 
+    def get_validators(self):
+        profile = User.objects.filter(
+            username=self.kwargs.get('username')
+        ).values(
+            'pk', 'first_name', 'last_name', 'date_joined', 'is_staff'
+        ).first()
+        if profile is None:
+            return None
+        updated_at = Post.objects.filter(author=profile['pk']).aggregate(
+            updated_at=Max('updated_at')
+        )['updated_at']
+        versions = tag_versions(profile_tag(profile['pk']))
+        return (profile, updated_at, versions), None
+
     def get_object(self, queryset=None):
         username = self.kwargs.get('username')
-        return get_object_or_404(User, username=username)
+        return get_object_or_404(
+            CachedQuerySet(User).cached('user_by_username'),
+            username=username
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user_posts = Post.objects.filter(
-            author=self.object
-        ).order_by('-pub_date')
+        user_posts = card_queryset(Post.objects.filter(author=self.object))
         context['page_obj'] = paginate_queryset(user_posts, self.request)
         return context
 
@@ -156,29 +197,63 @@ class PostDeleteView(LoginRequiredMixin, PostMixin,
         return reverse('blog:index')
 
 
-class PublishedPostsView(LoginRequiredMixin, PostMixin, ListView):
+class PublishedPostsView(LoginRequiredMixin, SharedPageMixin,
+                         PostMixin, ListView):
     """Отображает главную страницу с постами."""
 
     template_name = 'blog/index.html'
     paginate_by = PAGINATE_COUNT
+    stale_while_revalidate = True
 
     def get_queryset(self):
-        return Post.objects.filter(
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now()
-        )
+        return TimelineEntry.objects.filter(
+            pub_date__lte=visibility_cutoff()
+        ).cached('feed_page')
+
+    def get_validators(self):
+        updated_at = TimelineEntry.objects.aggregate(
+            updated_at=Max('updated_at')
+        )['updated_at']
+        return (visibility_cutoff(), updated_at), None
 
+    def paginate_queryset(self, queryset, page_size):
+        page = paginate_queryset(queryset, self.request)
+        return page.paginator, page, page.object_list, page.has_other_pages()
 
-class PostDetailView(LoginRequiredMixin, PostMixin, DetailView):
+
+class PostDetailView(LoginRequiredMixin, SharedPageMixin,
+                     PostMixin, DetailView):
     """Отображает страницу поста."""
 
     template_name = 'blog/detail.html'
     context_object_name = 'post'
 
+    def get_validators(self):
+        post = Post.objects.filter(pk=self.kwargs.get('post_id')).values(
+            'author', 'is_published', 'comment_count', 'updated_at',
+            'category__updated_at', 'location__updated_at',
+        ).first()
+        if post is None or (
+            not post['is_published'] and post['author'] != self.request.user.pk
+        ):
+            return None
+        stamps = [
+            post[field] for field in (
+                'updated_at', 'category__updated_at', 'location__updated_at',
+            )
+            if post[field] is not None
+        ]
+        versions = tag_versions(post_tag(self.kwargs.get('post_id')))
+        return (post['comment_count'], stamps, versions), max(stamps)
+
     def get_object(self, queryset=None):
         post_id = self.kwargs.get('post_id')
-        post = get_object_or_404(self.get_queryset(), id=post_id)
+        # Страница выводит сохранённый HTML, сам текст не нужен.
+        post = get_object_or_404(
+            self.get_queryset().select_related('image_blob').defer('text'),
+            id=post_id
+        )
+        attach_lookups([post])
 
         if not post.is_published:
             if self.request.user != post.author:
@@ -189,10 +264,11 @@ class PostDetailView(LoginRequiredMixin, PostMixin, DetailView):
         context = super().get_context_data(**kwargs)
         context['profile'] = self.object.author
         context['form'] = CommentForm()
-        context['comments'] = (
-            self.object.comments.select_related('author')
-        )
-        context['comment_count'] = self.object.comments.count()
+        comments = render_comment_page(self.object)
+        if not context['shared_page']:
+            comments = fill_holes(comments, self.request)
+        context['comments_html'] = mark_safe(comments)
+        context['comment_count'] = self.object.comment_count
         return context
 
 
@@ -205,38 +281,47 @@ class CategoryListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         user = self.request.user
-        published_posts = Post.objects.filter(
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now()
-        )
         user_posts = Post.objects.filter(
             author=user,
             is_published=False
         )
-        return published_posts | user_posts
+        return published_posts() | user_posts
 
 
-class CategoryDetailView(LoginRequiredMixin, DetailView):
+class CategoryDetailView(LoginRequiredMixin, SharedPageMixin,
+                         DetailView):
     """Отображает страницу с постами выбранной категории."""
 
     model = Category
     template_name = 'blog/category.html'
     context_object_name = 'category'
+    stale_while_revalidate = True
+
+    def get_validators(self):
+        category = category_by_slug(self.kwargs.get(self.slug_url_kwarg))
+        if category is None or not category.is_published:
+            return None
+        updated_at = published_posts(
+            Post.objects.filter(category=category)
+        ).aggregate(updated_at=Max('updated_at'))['updated_at']
+        stamps = [category.updated_at]
+        if updated_at is not None:
+            stamps.append(updated_at)
+        versions = tag_versions(category_tag(category.pk))
+        return (visibility_cutoff(), stamps, versions), None
 
     def get_object(self, queryset=None):
-        category = super().get_object(queryset)
+        category = category_by_slug(self.kwargs.get(self.slug_url_kwarg))
+        if category is None:
+            raise Http404('Категория не найдена.')
         if not category.is_published:
             raise Http404('Категория недоступна.')
         return category
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        now = timezone.now()
-        posts = Post.objects.filter(
-            category=self.object,
-            is_published=True,
-            pub_date__lte=now
-        ).order_by('-pub_date')
+        posts = card_queryset(
+            published_posts(self.object.category_posts.all())
+        )
         context['page_obj'] = paginate_queryset(posts, self.request)
         return context
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cache import FEED_VERSION, get_versions
+from .constance import VISIBILITY_BUCKET
+from .models import TimelineEntry
+
+
+def _bucket_width():
+    return getattr(settings, 'BLOG_VISIBILITY_BUCKET', VISIBILITY_BUCKET)
+
+
+def _bucket_start(now, width):
+    timestamp = int(now.timestamp()) // width * width
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+def publication_schedule(bucket_start, bucket_end):
+    """Моменты публикации видимых постов внутри интервала времени.
+
+    Расписание кэшируется до конца интервала и сбрасывается при любом
+    изменении состава лент.
+    """
+    version = get_versions([FEED_VERSION])[FEED_VERSION]
+    key = f'schedule:{bucket_start.timestamp():.0f}:{version}'
+    schedule = cache.get(key)
+    if schedule is None:
+        schedule = list(
+            TimelineEntry.objects.filter(
+                pub_date__gt=bucket_start, pub_date__lte=bucket_end
+            ).order_by('pub_date').values_list('pub_date', flat=True)
+        )
+        cache.set(key, schedule, _bucket_width())
+    return schedule
+
+
+def visibility_window(now=None):
+    """Возвращает границу видимости постов и момент её следующей смены.
+
+    Граница — начало текущего интервала шириной BLOG_VISIBILITY_BUCKET
+    секунд, сдвинутое на время последней уже наступившей публикации
+    из расписания. Условие ``pub_date <= граница`` отбирает ровно те же
+    посты, что и ``pub_date <= now``, но не меняется между публикациями,
+    поэтому запросы и ключи кэша лент повторяются.
+    """
+    now = now or timezone.now()
+    width = _bucket_width()
+    bucket_start = _bucket_start(now, width)
+    bucket_end = bucket_start + timedelta(seconds=width)
+    schedule = publication_schedule(bucket_start, bucket_end)
+    cutoff = bucket_start
+    expires_at = bucket_end
+    for pub_date in schedule:
+        if pub_date > now:
+            expires_at = pub_date
+            break
+        cutoff = pub_date
+    return cutoff, expires_at
+
+
+def visibility_cutoff(now=None):
+    """Граница видимости для условия ``pub_date__lte`` в лентах."""
+    return visibility_window(now)[0]
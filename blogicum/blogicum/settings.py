@@ -76,6 +76,18 @@ DATABASES = {
     }
 }
 
+# LocMemCache подходит только для разработки: у каждого процесса свой
+# кэш. В рабочем развёртывании нужен общий для всех процессов кэш
+# (Redis, Memcached, база данных), иначе версии кэша (blog.cache),
+# блокировки заполнения (blog.single_flight) и прогрев командой
+# warm_cache действуют только внутри одного процесса.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum',
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
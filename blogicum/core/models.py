@@ -1,13 +1,22 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 from blog.constance import TITLE_LENGTH
 
 
 class PublishedModel(models.Model):
-    """Абстрактная модель. Добавляет флаг is_published и created_at."""
+    """Абстрактная модель.
+
+    Добавляет флаг is_published, created_at и updated_at.
+    """
 
     created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    # Вместо auto_now: у записей из фикстур, которые loaddata сохраняет
+    # без save(), поле должно получить значение по умолчанию.
+    updated_at = models.DateTimeField(
+        'Изменено', default=timezone.now, db_index=True
+    )
     is_published = models.BooleanField(
         'Опубликовано', default=True,
         help_text='Снимите галочку, чтобы скрыть публикацию.')
@@ -15,6 +24,13 @@ class PublishedModel(models.Model):
     class Meta:
         abstract = True
 
+    def save(self, *args, **kwargs):
+        self.updated_at = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'updated_at'}
+        super().save(*args, **kwargs)
+
 
 class TitleModel(models.Model):
     """Абстрактная модель. Добавляет Title."""
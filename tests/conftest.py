@@ -18,6 +18,7 @@ from typing import (
 
 import pytest
 from django.apps import apps
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from django.db.models import Model, Field
 from django.forms import BaseForm
@@ -41,6 +42,31 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def disable_stale_pages():
+    # Тесты проверяют страницу сразу после изменения данных, поэтому
+    # устаревшие копии по умолчанию не отдаются (см. test_swr.py).
+    with override_settings(BLOG_SWR_HARD_TTL=0):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def run_jobs_inline():
+    # Фоновые потоки очереди заданий не должны пересекаться с очисткой
+    # базы между тестами, поэтому задания выполняются сразу.
+    with override_settings(BLOG_JOB_WORKERS=0):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from blog.local_cache import local_cache
+
+    cache.clear()
+    local_cache.clear()
+    yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -363,6 +389,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
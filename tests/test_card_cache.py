@@ -0,0 +1,35 @@
+import pytest
+from django.test import override_settings
+
+from blog.cards import card_stats
+
+pytestmark = [pytest.mark.django_db]
+
+
+@override_settings(BLOG_SHARED_PAGE_CACHE=False)
+def test_cards_are_served_from_cache(
+        user_client, many_posts_with_published_locations
+):
+    user_client.get("/")
+    before = card_stats.snapshot()
+    user_client.get("/")
+    after = card_stats.snapshot()
+    assert after["hit"] - before["hit"] == 10
+    assert after["miss"] == before["miss"]
+
+
+def test_card_cache_is_invalidated(
+        mixer, user, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    profile_url = f"/profile/{user.username}/"
+    user_client.get(profile_url)
+
+    post.category.title = "Новое название категории"
+    post.category.save()
+    content = user_client.get(profile_url).content.decode("utf-8")
+    assert "Новое название категории" in content
+
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    content = user_client.get(profile_url).content.decode("utf-8")
+    assert "Комментарии (3)" in content
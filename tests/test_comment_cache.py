@@ -0,0 +1,42 @@
+import pytest
+
+from blog.comment_cache import comment_stats, render_comment_page
+
+pytestmark = [pytest.mark.django_db]
+
+EDIT_LINK = "Отредактировать комментарий"
+
+
+def test_comment_page_is_rendered_once(
+        mixer, user, post_with_published_location
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    first = render_comment_page(post)
+    stats = comment_stats.snapshot()
+    assert render_comment_page(post) == first
+    assert comment_stats.snapshot()["hit"] == stats["hit"] + 1
+    assert "<!--hole:comment_controls" in first
+
+    mixer.blend("blog.Comment", post=mixer.blend("blog.Post"))
+    assert render_comment_page(post) == first
+
+    comment.text = "Новый текст"
+    comment.save()
+    assert "Новый текст" in render_comment_page(post)
+
+
+def test_author_links_are_added_per_viewer(
+        mixer, user, user_client, another_user_client,
+        post_with_published_location
+):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post, author=user)
+    url = f"/posts/{post.id}/comments/"
+    own = user_client.get(url).content.decode("utf-8")
+    stats = comment_stats.snapshot()
+    other = another_user_client.get(url).content.decode("utf-8")
+    assert comment_stats.snapshot()["miss"] == stats["miss"]
+    assert EDIT_LINK in own
+    assert EDIT_LINK not in other
+    assert "<!--hole:" not in own + other
@@ -0,0 +1,59 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from blog.models import TimelineEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_counter_follows_comments(
+        mixer, user_client, post_with_published_location, another_category
+):
+    post = post_with_published_location
+    user_client.post(f"/posts/{post.id}/comment/", data={"text": "Первый"})
+    comment = mixer.blend("blog.Comment", post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 2
+
+    other_post = mixer.blend("blog.Post", category=another_category)
+    comment.post = other_post
+    comment.save()
+    post.refresh_from_db()
+    other_post.refresh_from_db()
+    assert (post.comment_count, other_post.comment_count) == (1, 1)
+
+    comment.delete()
+    other_post.refresh_from_db()
+    assert other_post.comment_count == 0
+
+
+def test_recount_comments_fixes_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=7)
+
+    with pytest.raises(CommandError):
+        call_command("recount_comments", "--check")
+
+    call_command("recount_comments", "--chunk-size", "1")
+    post.refresh_from_db()
+    assert post.comment_count == 3
+    call_command("recount_comments", "--check")
+
+
+def test_recount_comments_updates_cards(
+        mixer, user, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post)
+    for url in ("/", f"/profile/{user.username}/"):
+        assert "Комментарии (1)" in user_client.get(url).content.decode()
+    type(post).objects.filter(pk=post.pk).update(comment_count=7)
+    TimelineEntry.objects.filter(pk=post.pk).update(comment_count=7)
+
+    call_command("recount_comments")
+    assert TimelineEntry.objects.get(pk=post.pk).comment_count == 1
+    for url in ("/", f"/profile/{user.username}/"):
+        content = user_client.get(url).content.decode()
+        assert "Комментарии (1)" in content
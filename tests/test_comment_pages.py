@@ -0,0 +1,53 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.constance import COMMENTS_PAGINATE_COUNT
+
+pytestmark = [pytest.mark.django_db]
+
+N_COMMENTS = COMMENTS_PAGINATE_COUNT + 5
+
+
+def _comment_ids(content):
+    return [int(i) for i in re.findall(r'name="comment_(\d+)"', content)]
+
+
+def test_comments_are_loaded_in_batches(
+        mixer, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    comments = [
+        mixer.blend("blog.Comment", post=post) for _ in range(N_COMMENTS)
+    ]
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.get(f"/posts/{post.id}/")
+    assert not any(
+        "COUNT(" in query["sql"] for query in context.captured_queries
+    ), "Число комментариев должно браться из счётчика поста."
+
+    content = response.content.decode("utf-8")
+    assert f"Комментарии ({N_COMMENTS})" in content
+    first_batch = _comment_ids(content)
+    assert first_batch == [c.id for c in comments[:COMMENTS_PAGINATE_COUNT]]
+
+    more_url = re.search(
+        r'href="(/posts/\d+/comments/\?after=[^"]+)"', content
+    )[1]
+    fragment = user_client.get(more_url).content.decode("utf-8")
+    assert _comment_ids(fragment) == [
+        c.id for c in comments[COMMENTS_PAGINATE_COUNT:]
+    ]
+    assert "?after=" not in fragment
+
+
+def test_hidden_post_comments_are_not_served(
+        another_user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    url = f"/posts/{post.id}/comments/"
+    assert another_user_client.get(url).status_code == 404
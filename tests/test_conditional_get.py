@@ -0,0 +1,172 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from django.utils.http import http_date
+
+from blog.models import Category
+
+pytestmark = [pytest.mark.django_db]
+
+
+def revalidate(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.has_header("ETag")
+    return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+
+@pytest.mark.parametrize("url", ["/", "/category/{category}/"])
+def test_unchanged_feed_is_not_modified(
+        user_client, post_with_published_location, url
+):
+    url = url.format(category=post_with_published_location.category.slug)
+    response = revalidate(user_client, url)
+    assert response.status_code == 304
+    assert not response.content
+
+
+def test_detail_is_revalidated_after_comment(
+        mixer, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    etag = user_client.get(url)["ETag"]
+    assert user_client.get(
+        url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == 304
+
+    comment = mixer.blend("blog.Comment", post=post)
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+    etag = response["ETag"]
+    comment.text = "Исправленный комментарий"
+    comment.save()
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert "Исправленный комментарий" in response.content.decode("utf-8")
+
+
+def test_post_detail_last_modified(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    response = user_client.get(url)
+    post.refresh_from_db()
+    assert response["Last-Modified"] == http_date(
+        int(post.updated_at.timestamp())
+    )
+    response = user_client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+    )
+    assert response.status_code == 304
+
+
+def _since_now():
+    return http_date(int(timezone.now().timestamp()) + 60)
+
+
+@pytest.mark.parametrize("change", ["delete", "unpublish"])
+@pytest.mark.parametrize(
+    "url", ["/", "/category/{category}/", "/profile/{author}/"]
+)
+def test_list_is_revalidated_by_etag_only(
+        user_client, post_with_published_location, change, url
+):
+    post = post_with_published_location
+    url = url.format(
+        category=post.category.slug, author=post.author.username
+    )
+    response = user_client.get(url)
+    assert not response.has_header("Last-Modified")
+    etag = response["ETag"]
+    if change == "delete":
+        post.delete()
+    else:
+        post.is_published = False
+        post.save()
+
+    response = user_client.get(url, HTTP_IF_MODIFIED_SINCE=_since_now())
+    assert response.status_code == 200
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+
+
+def test_profile_is_revalidated_after_name_change(user, user_client):
+    url = f"/profile/{user.username}/"
+    etag = user_client.get(url)["ETag"]
+    user.first_name = "Новое имя"
+    user.save()
+    response = user_client.get(url, HTTP_IF_MODIFIED_SINCE=_since_now())
+    assert response.status_code == 200
+    assert "Новое имя" in response.content.decode("utf-8")
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+
+
+def test_etag_is_per_user(
+        user_client, another_user_client, post_with_published_location
+):
+    etag = user_client.get("/")["ETag"]
+    response = another_user_client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+
+
+def test_hidden_post_is_not_revalidated(
+        user_client, another_user_client, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    etag = another_user_client.get(url)["ETag"]
+    post.is_published = False
+    post.save()
+    response = another_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 404
+
+
+def test_category_is_revalidated_when_scheduled_post_appears(
+        monkeypatch, mixer, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    now = timezone.now()
+    scheduled = mixer.blend(
+        "blog.Post", is_published=True, category=post.category,
+        author=post.author, pub_date=now + timedelta(hours=1),
+        title="Отложенный пост"
+    )
+    post.title = "Исправленный пост"
+    post.save()
+    url = f"/category/{post.category.slug}/"
+    etag = user_client.get(url)["ETag"]
+    monkeypatch.setattr(timezone, "now", lambda: now + timedelta(hours=2))
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert scheduled.title in response.content.decode("utf-8")
+
+
+def test_fixture_without_updated_at_loads(tmp_path):
+    fixture = tmp_path / "categories.json"
+    fixture.write_text(json.dumps([{
+        "model": "blog.category",
+        "pk": 100,
+        "fields": {
+            "title": "Из фикстуры",
+            "description": "Описание",
+            "slug": "from-fixture",
+            "is_published": True,
+            "created_at": "2023-01-01T00:00:00Z",
+        },
+    }]))
+    call_command("loaddata", str(fixture), verbosity=0)
+    category = Category.objects.get(pk=100)
+    assert category.updated_at is not None
+
+    stamp = category.updated_at
+    category.title = "Исправленная категория"
+    category.save(update_fields=["title"])
+    category.refresh_from_db()
+    assert category.updated_at > stamp
@@ -0,0 +1,99 @@
+import hashlib
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image
+
+from blog.models import ImageBlob, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path, BLOG_SHARED_PAGE_CACHE=False):
+        yield tmp_path
+
+
+def _jpeg(width, height, orientation=None):
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color=(73, 109, 137)).save(
+        buffer, format="JPEG", exif=exif
+    )
+    return buffer.getvalue()
+
+
+def test_metadata_is_saved_on_upload(post_with_published_location):
+    post = post_with_published_location
+    content = _jpeg(800, 600)
+    post.image = ImageFile(BytesIO(content), name="photo.jpg")
+    post.save()
+    post = Post.objects.get(pk=post.pk)
+    assert (post.image_width, post.image_height) == (800, 600)
+    assert post.image_bytes == len(content)
+    assert post.image_blob.sha256 == hashlib.sha256(content).hexdigest()
+
+
+def test_same_content_shares_metadata(
+        post_with_published_location, post_with_another_category
+):
+    content = _jpeg(300, 200)
+    blobs = ImageBlob.objects.count()
+    for post in (post_with_published_location, post_with_another_category):
+        post.image = ImageFile(BytesIO(content), name="photo.jpg")
+        post.save()
+    assert ImageBlob.objects.count() == blobs + 1
+    assert post_with_published_location.image_blob_id == (
+        post_with_another_category.image_blob_id
+    )
+
+
+def test_exif_rotation_swaps_dimensions(post_with_published_location):
+    post = post_with_published_location
+    post.image = ImageFile(BytesIO(_jpeg(800, 600, 6)), name="photo.jpg")
+    post.save()
+    assert (post.image_width, post.image_height) == (600, 800)
+
+
+def test_metadata_is_cleared_with_image(post_with_published_location):
+    post = post_with_published_location
+    post.image = ImageFile(BytesIO(_jpeg(300, 200)), name="photo.jpg")
+    post.save()
+    post.image = None
+    post.save()
+    assert Post.objects.get(pk=post.pk).image_blob is None
+
+
+def test_pages_do_not_read_the_image(
+        media_root, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = ImageFile(BytesIO(_jpeg(800, 600)), name="photo.jpg")
+    post.save()
+    (media_root / post.image.name).unlink()
+    category = user_client.get(
+        f"/category/{post.category.slug}/"
+    ).content.decode()
+    assert 'width="800" height="600"' in category
+    detail = user_client.get(f"/posts/{post.id}/").content.decode()
+    assert 'width="800" height="600"' in detail
+
+
+def test_describe_images_backfills_metadata(
+        media_root, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = ImageFile(BytesIO(_jpeg(640, 480)), name="photo.jpg")
+    post.save()
+    Post.objects.filter(pk=post.pk).update(image_blob=None)
+    out = StringIO()
+    call_command("describe_images", stdout=out)
+    assert "Обработано изображений: 1, с ошибками: 0" in out.getvalue()
+    post = Post.objects.get(pk=post.pk)
+    assert (post.image_width, post.image_height) == (640, 480)
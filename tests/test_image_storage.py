@@ -0,0 +1,181 @@
+import hashlib
+from io import BytesIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.test import override_settings
+from PIL import Image
+
+from blog.models import ImageBlob, Post
+from blog.renditions import rendition_names
+from blog.storage import ContentAddressedStorage
+from blog.tasks import collect_images
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path, BLOG_SHARED_PAGE_CACHE=False):
+        yield tmp_path
+
+
+def _jpeg(color=(73, 109, 137)):
+    buffer = BytesIO()
+    Image.new("RGB", (800, 400), color=color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _upload(post, content, capture, name="photo.JPG"):
+    post.image = ImageFile(BytesIO(content), name=name)
+    with capture(execute=True):
+        post.save()
+    post.refresh_from_db()
+
+
+def _files(root):
+    return sorted(
+        path.relative_to(root).as_posix()
+        for path in root.rglob("*") if path.is_file()
+    )
+
+
+def test_files_are_named_by_content(
+        post_with_published_location, django_capture_on_commit_callbacks
+):
+    content = _jpeg()
+    digest = hashlib.sha256(content).hexdigest()
+    _upload(
+        post_with_published_location, content,
+        django_capture_on_commit_callbacks
+    )
+    assert post_with_published_location.image.name == (
+        f"post_images/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+    )
+
+
+def test_same_content_is_stored_once(
+        media_root, post_with_published_location, post_with_another_category,
+        django_capture_on_commit_callbacks
+):
+    content = _jpeg()
+    posts = (post_with_published_location, post_with_another_category)
+    for post in posts:
+        _upload(post, content, django_capture_on_commit_callbacks)
+    first, second = posts
+    assert first.image.name == second.image.name
+    assert second.renditions_ready
+    blob = first.image_blob
+    assert blob.ref_count == 2
+    assert blob.name == first.image.name
+    assert _files(media_root).count(first.image.name) == 1
+
+
+def test_unreferenced_files_are_collected(
+        media_root, user_client, post_with_published_location,
+        post_with_another_category, django_capture_on_commit_callbacks
+):
+    content = _jpeg()
+    first, second = post_with_published_location, post_with_another_category
+    for post in (first, second):
+        _upload(post, content, django_capture_on_commit_callbacks)
+    name, width = first.image.name, first.image_width
+    stored = [name, *rendition_names(name, width)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    assert ImageBlob.objects.get(pk=first.image_blob_id).ref_count == 1
+    assert all((media_root / path).exists() for path in stored)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user_client.post(f"/posts/{first.id}/delete/")
+    assert not Post.objects.filter(pk=first.pk).exists()
+    assert not any((media_root / path).exists() for path in stored)
+    blob = ImageBlob.objects.get(pk=first.image_blob_id)
+    assert (blob.ref_count, blob.name) == (0, "")
+
+
+def test_replaced_image_is_collected(
+        media_root, post_with_published_location,
+        django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+    _upload(post, _jpeg(), django_capture_on_commit_callbacks)
+    old_name = post.image.name
+    _upload(
+        post, _jpeg(color=(200, 10, 10)), django_capture_on_commit_callbacks
+    )
+    assert post.image.name != old_name
+    assert not (media_root / old_name).exists()
+    assert (media_root / post.image.name).exists()
+
+
+def test_reuploaded_content_is_stored_again(
+        media_root, post_with_published_location, post_with_another_category,
+        django_capture_on_commit_callbacks
+):
+    content = _jpeg()
+    first, second = post_with_published_location, post_with_another_category
+    _upload(first, content, django_capture_on_commit_callbacks)
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    _upload(second, content, django_capture_on_commit_callbacks)
+    assert (media_root / second.image.name).exists()
+    assert second.image_blob.name == second.image.name
+    assert second.renditions_ready
+
+
+def test_extension_follows_image_format(
+        media_root, post_with_published_location, post_with_another_category,
+        django_capture_on_commit_callbacks
+):
+    content = _jpeg()
+    first, second = post_with_published_location, post_with_another_category
+    _upload(first, content, django_capture_on_commit_callbacks, "a.jpeg")
+    _upload(second, content, django_capture_on_commit_callbacks, "b.png")
+    assert first.image.name == second.image.name
+    assert first.image.name.endswith(".jpg")
+    assert first.image_blob.ref_count == 2
+
+
+def test_file_collected_during_upload_is_stored_again(
+        media_root, monkeypatch, post_with_published_location,
+        post_with_another_category, django_capture_on_commit_callbacks
+):
+    content = _jpeg()
+    first, second = post_with_published_location, post_with_another_category
+    _upload(first, content, django_capture_on_commit_callbacks)
+    first.delete()
+    save = ContentAddressedStorage.save
+
+    def save_then_collect(storage, *args, **kwargs):
+        # Файл ещё на месте, но сборка удаляет его до фиксации поста.
+        name = save(storage, *args, **kwargs)
+        collect_images()
+        assert not (media_root / name).exists()
+        return name
+
+    monkeypatch.setattr(ContentAddressedStorage, "save", save_then_collect)
+    _upload(second, content, django_capture_on_commit_callbacks)
+    assert (media_root / second.image.name).exists()
+    assert second.image_blob.name == second.image.name
+    assert second.renditions_ready
+
+
+def test_exif_is_stripped_from_original(
+        media_root, post_with_published_location,
+        django_capture_on_commit_callbacks
+):
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = "Camera"
+    exif.get_ifd(0x8825)[2] = (55.0, 45.0, 0.0)
+    buffer = BytesIO()
+    Image.new("RGB", (800, 400)).save(buffer, "JPEG", exif=exif.tobytes())
+    post = post_with_published_location
+    _upload(post, buffer.getvalue(), django_capture_on_commit_callbacks)
+
+    stored = (media_root / post.image.name).read_bytes()
+    assert dict(Image.open(BytesIO(stored)).getexif()) == {0x0112: 6}
+    assert post.image_blob.sha256 == hashlib.sha256(stored).hexdigest()
+    assert (post.image_width, post.image_height) == (400, 800)
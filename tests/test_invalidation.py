@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import transaction
+
+from blog.cache import tag_versions
+from blog.invalidation import (
+    FEED_TAG, card_tag, category_tag, post_tag, profile_tag
+)
+
+
+def _changed(tags, before):
+    return [after != old for after, old in zip(tag_versions(*tags), before)]
+
+
+def _shared_versions(tags):
+    """Версии, которые видит соединение вне текущей транзакции."""
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(tag_versions, *tags).result()
+
+
+@pytest.mark.django_db
+def test_comment_maps_to_post_pages(mixer, user, post_with_published_location):
+    post = post_with_published_location
+    tags = (
+        card_tag(post.id), post_tag(post.id),
+        category_tag(post.category_id), profile_tag(user.id), FEED_TAG
+    )
+    before = tag_versions(*tags)
+    mixer.blend("blog.Comment", post=post, author=user)
+    assert _changed(tags, before) == [True, True, True, True, False]
+
+
+@pytest.mark.django_db
+def test_user_change_reaches_commented_posts(
+        mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    tags = (post_tag(post.id), profile_tag(another_user.id))
+    before = tag_versions(*tags)
+    another_user.last_login = None
+    another_user.save(update_fields=["last_login"])
+    assert _changed(tags, before) == [False, False]
+    another_user.username = "renamed"
+    another_user.save()
+    assert _changed(tags, before) == [True, True]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_invalidations_are_batched_until_commit(post_with_published_location):
+    post = post_with_published_location
+    tags = (post_tag(post.id), FEED_TAG)
+    before = tag_versions(*tags)
+    with transaction.atomic():
+        post.title = "Первая правка"
+        post.save()
+        first = tag_versions(*tags)
+        post.title = "Вторая правка"
+        post.save()
+        assert _changed(tags, before) == [True, True]
+        assert _changed(tags, first) == [True, True]
+        assert _shared_versions(tags) == before
+    after = tag_versions(*tags)
+    assert [new - old for new, old in zip(after, before)] == [1, 1]
+
+    before = tag_versions(*tags)
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            post.save()
+            raise RuntimeError
+    assert tag_versions(*tags) == before
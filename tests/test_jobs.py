@@ -0,0 +1,107 @@
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from blog.jobs import (
+    TASKS, enqueue, job_wait, queue_depth, requeue_stale, run_pending, task
+)
+from blog.models import Job
+
+pytestmark = [pytest.mark.django_db]
+
+calls = []
+
+
+@pytest.fixture(autouse=True)
+def test_tasks():
+    calls.clear()
+    task("record")(calls.append)
+
+    @task("fail")
+    def fail(argument):
+        raise RuntimeError(argument)
+
+    yield
+    TASKS.pop("record")
+    TASKS.pop("fail")
+
+
+@override_settings(BLOG_JOB_WORKERS=0)
+def test_jobs_run_after_commit(django_capture_on_commit_callbacks):
+    observed = job_wait.snapshot()["count"]
+    with django_capture_on_commit_callbacks(execute=True):
+        enqueue("record", 1)
+        enqueue("record", 2)
+        assert calls == []
+        assert queue_depth()["pending"] == 2
+    assert calls == ["1", "2"]
+    assert not Job.objects.exists()
+    assert job_wait.snapshot()["count"] == observed + 2
+
+
+@override_settings(BLOG_JOB_MAX_ATTEMPTS=2, BLOG_JOB_RETRY_DELAY=0)
+def test_failing_job_is_retried_then_kept():
+    enqueue("fail", "boom")
+    assert run_pending() == 2
+    job = Job.objects.get()
+    assert (job.status, job.attempts) == (Job.FAILED, 2)
+    assert "boom" in job.error
+
+
+@override_settings(BLOG_JOB_MAX_ATTEMPTS=2, BLOG_JOB_RETRY_DELAY=60)
+def test_failed_job_waits_before_retry():
+    enqueue("fail", "boom")
+    assert run_pending() == 1
+    job = Job.objects.get()
+    assert (job.status, job.attempts) == (Job.PENDING, 1)
+    assert job.run_after > timezone.now() + timedelta(seconds=50)
+    assert run_pending() == 0
+
+    Job.objects.update(run_after=timezone.now())
+    assert run_pending() == 1
+    assert Job.objects.get().status == Job.FAILED
+
+
+def test_unknown_task_is_rejected():
+    with pytest.raises(KeyError):
+        enqueue("missing")
+
+
+def test_stale_running_jobs_are_requeued():
+    job = enqueue("record", "x")
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.RUNNING, started_at=timezone.now() - timedelta(hours=1)
+    )
+    out = StringIO()
+    call_command("run_jobs", stdout=out)
+    assert "Возвращено в очередь: 1, обработано: 1." in out.getvalue()
+    assert calls == ["x"]
+    assert requeue_stale() == 0
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(BLOG_JOB_WORKERS=2)
+def test_jobs_run_in_worker_threads():
+    done = threading.Event()
+
+    @task("thread")
+    def record_thread(argument):
+        calls.append(threading.current_thread().name)
+        done.set()
+
+    try:
+        enqueue("thread")
+        assert done.wait(5)
+        deadline = time.monotonic() + 5
+        while Job.objects.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        TASKS.pop("thread")
+    assert calls[0].startswith("blog-jobs")
+    assert not Job.objects.exists()
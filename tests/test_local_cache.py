@@ -0,0 +1,61 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.forms import PostForm
+from blog.local_cache import LocalCache, local_cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _lookup_queries(context):
+    return [
+        query["sql"] for query in context.captured_queries
+        if 'FROM "blog_category"' in query["sql"]
+        or 'FROM "blog_location"' in query["sql"]
+    ]
+
+
+def test_local_cache_is_bounded():
+    lru = LocalCache(maxsize=2, ttl=60)
+    lru.set("a", (1,), "A")
+    lru.set("b", (1,), "B")
+    assert lru.get("a", (1,)) == "A"
+    lru.set("c", (1,), "C")
+    assert lru.get("b", (1,)) is None
+    assert lru.get("a", (2,)) is None
+    assert LocalCache(maxsize=2, ttl=-1).get("a", (1,)) is None
+
+
+def test_post_form_choices_come_from_cache(
+        mixer, published_category, published_location
+):
+    str(PostForm())
+    with CaptureQueriesContext(connection) as context:
+        html = str(PostForm())
+    assert not _lookup_queries(context)
+    assert published_category.title in html
+
+    new_category = mixer.blend("blog.Category", title="Свежая категория")
+    assert new_category.title in str(PostForm())
+
+
+def test_other_workers_drop_stale_entries(published_category):
+    str(PostForm())
+    # Другой процесс меняет таблицу напрямую в базе: версия таблицы
+    # в общем кэше повышается, и локальная копия больше не используется.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'UPDATE "blog_category" SET "title" = %s', ["Из другого процесса"]
+        )
+    assert "Из другого процесса" in str(PostForm())
+
+
+def test_category_page_object_is_not_queried(
+        user_client, post_with_published_location
+):
+    url = f"/category/{post_with_published_location.category.slug}/"
+    user_client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        user_client.get(f"{url}?page=1")
+    assert not _lookup_queries(context)
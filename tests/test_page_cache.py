@@ -0,0 +1,41 @@
+import pytest
+
+from blog.page_cache import page_stats
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_page_is_shared_between_users(
+        user, another_user, user_client, another_user_client,
+        post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    user_client.get(url)
+    before = page_stats.snapshot()
+    response = another_user_client.get(url)
+    after = page_stats.snapshot()
+    assert after["hit"] - before["hit"] == 1
+    assert after["miss"] == before["miss"]
+
+    content = response.content.decode("utf-8")
+    assert "<!--hole:" not in content
+    assert f"/profile/{another_user.username}/" in content
+    assert "Удалить публикацию" not in content
+    assert "csrfmiddlewaretoken" in content
+
+    content = user_client.get(url).content.decode("utf-8")
+    assert "Удалить публикацию" in content
+
+
+def test_comment_controls_are_per_user(
+        mixer, user, user_client, another_user_client,
+        post_with_published_location
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    url = f"/posts/{post.id}/"
+    edit_url = f"/posts/{post.id}/edit_comment/{comment.id}/"
+    assert edit_url in user_client.get(url).content.decode("utf-8")
+    assert edit_url not in another_user_client.get(url).content.decode(
+        "utf-8"
+    )
@@ -0,0 +1,139 @@
+import base64
+import json
+import re
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _page_ids(response):
+    return [post.id for post in response.context["page_obj"]]
+
+
+def _cursor_link(response, direction):
+    match = re.search(
+        rf'href="\?{direction}=([\w-]+)"', response.content.decode("utf-8")
+    )
+    return match and match.group(1)
+
+
+def test_cursor_pagination_walks_whole_feed(
+        user_client, many_posts_with_published_locations
+):
+    expected_ids = [
+        post.id for post in sorted(
+            many_posts_with_published_locations,
+            key=lambda post: (post.pub_date, post.id),
+            reverse=True,
+        )
+    ]
+    response = user_client.get("/")
+    page_ids = _page_ids(response)
+    seen_ids = list(page_ids)
+    cursor = _cursor_link(response, "after")
+    while cursor:
+        response = user_client.get(f"/?after={cursor}")
+        page_ids = _page_ids(response)
+        assert len(page_ids) <= N_PER_PAGE
+        seen_ids.extend(page_ids)
+        cursor = _cursor_link(response, "after")
+    assert seen_ids == expected_ids, (
+        "Убедитесь, что переход по курсорным ссылкам обходит всю ленту"
+        " без пропусков и повторов."
+    )
+
+    previous_cursor = _cursor_link(response, "before")
+    last_page_start = len(seen_ids) - len(page_ids)
+    response = user_client.get(f"/?before={previous_cursor}")
+    assert _page_ids(response) == (
+        expected_ids[last_page_start - N_PER_PAGE:last_page_start]
+    )
+
+
+def test_page_number_fallback(
+        user_client, user, many_posts_with_published_locations
+):
+    for url in ("/", f"/profile/{user.username}/"):
+        first_page = _page_ids(user_client.get(url))
+        second_page = _page_ids(user_client.get(f"{url}?page=2"))
+        cursor_page = _page_ids(
+            user_client.get(
+                f"{url}?after={_cursor_link(user_client.get(url), 'after')}"
+            )
+        )
+        assert second_page == cursor_page
+        assert not set(first_page) & set(second_page)
+
+
+def test_broken_cursor_shows_first_page(
+        user_client, many_posts_with_published_locations
+):
+    first_page = _page_ids(user_client.get("/"))
+    assert _page_ids(user_client.get("/?after=garbage")) == first_page
+
+
+def _token(values):
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("values", [
+    [1, 2],
+    [None, None],
+    ["2024-01-01T00:00:00+00:00", "1" * 25],
+    ["2024-01-01T00:00:00+00:00", ""],
+    ["", "1"],
+])
+@pytest.mark.parametrize("direction", ["after", "before"])
+def test_crafted_cursor_shows_first_page(
+        user, user_client, post_with_published_location, values, direction
+):
+    post = post_with_published_location
+    token = _token(values)
+    for url in (
+        "/", f"/category/{post.category.slug}/", f"/profile/{user.username}/"
+    ):
+        response = user_client.get(f"{url}?{direction}={token}")
+        assert response.status_code == 200
+        assert _page_ids(response) == _page_ids(user_client.get(url))
+    response = user_client.get(f"/posts/{post.id}/comments/?after={token}")
+    assert response.status_code == 200
+
+
+def _count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    return sum(
+        "COUNT(" in query["sql"] for query in context.captured_queries
+    )
+
+
+def test_page_count_is_cached(
+        mixer, user, user_client, many_posts_with_published_locations
+):
+    url = f"/profile/{user.username}/"
+    assert _count_queries(user_client, url) == 1
+    assert _count_queries(user_client, url) == 0
+
+    mixer.blend("blog.Post", author=user)
+    assert _count_queries(user_client, url) == 1
+
+
+@override_settings(BLOG_EXACT_COUNT_LIMIT=0, BLOG_SHARED_PAGE_CACHE=False)
+def test_count_is_skipped_for_large_tables(
+        user, user_client, many_posts_with_published_locations
+):
+    url = f"/profile/{user.username}/"
+    assert _count_queries(user_client, url) == 0
+    first_page = user_client.get(url).context["page_obj"]
+    assert first_page.has_next()
+    last_page = user_client.get(f"{url}?page=2").context["page_obj"]
+    assert len(last_page) == N_PER_PAGE
+    assert not last_page.has_next()
+    assert "Последняя" not in user_client.get(url).content.decode("utf-8")
@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _blend_posts_with_comments(mixer, n, user, category, location):
+    posts = mixer.cycle(n).blend(
+        "blog.Post", author=user, category=category, location=location
+    )
+    for post in posts:
+        mixer.blend("blog.Comment", post=post)
+    return posts
+
+
+def _count_page_queries(client, url) -> int:
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return len(context.captured_queries)
+
+
+@pytest.mark.parametrize(
+    "page", ["index", "category", "profile"]
+)
+def test_feed_queries_do_not_depend_on_cards_count(
+        mixer, user, user_client, published_category, published_location,
+        page
+):
+    urls = {
+        "index": "/",
+        "category": f"/category/{published_category.slug}/",
+        "profile": f"/profile/{user.username}/",
+    }
+    _blend_posts_with_comments(
+        mixer, 1, user, published_category, published_location
+    )
+    single_card_queries = _count_page_queries(user_client, urls[page])
+
+    _blend_posts_with_comments(
+        mixer, N_PER_PAGE, user, published_category, published_location
+    )
+    full_page_queries = _count_page_queries(user_client, urls[page])
+
+    assert single_card_queries == full_page_queries, (
+        "Убедитесь, что число запросов к базе данных при выводе ленты"
+        " не зависит от количества карточек на странице."
+    )
@@ -0,0 +1,54 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.cache import get_versions
+from blog.models import Category, Job
+from blog.query_cache import query_counter, table_tag
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _cached_titles():
+    return list(
+        Category.objects.filter(is_published=True)
+        .order_by("pk").values_list("title", flat=True)
+        .cached("published_categories")
+    )
+
+
+def test_repeated_query_is_served_from_cache(published_category):
+    counter = query_counter("published_categories")
+    before = counter.snapshot()
+    titles = _cached_titles()
+    with CaptureQueriesContext(connection) as context:
+        assert _cached_titles() == titles
+    assert not context.captured_queries
+    after = counter.snapshot()
+    assert (after["hit"] - before["hit"], after["miss"] - before["miss"]) == (
+        1, 1
+    )
+
+
+def test_any_write_to_table_invalidates(published_category):
+    _cached_titles()
+    Category.objects.filter(pk=published_category.pk).update(
+        title="Новое название"
+    )
+    assert "Новое название" in _cached_titles()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'UPDATE "blog_category" SET "is_published" = %s', [False]
+        )
+    assert _cached_titles() == []
+
+
+def test_writes_to_other_tables_are_not_tracked(published_category):
+    tags = [table_tag("blog_job"), table_tag("django_session")]
+    before = get_versions(tags)
+    Job.objects.create(task="collect_images")
+    Job.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM "django_session"')
+    assert get_versions(tags) == before
@@ -0,0 +1,53 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?(?P<table>\w+)$")
+# Небольшие справочники целиком загружает двухуровневый кэш.
+LOOKUP_TABLE_LOAD = re.compile(r'^SELECT .* FROM "blog_(category|location)"$')
+
+
+def _blog_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    return [
+        query["sql"] for query in context.captured_queries
+        if "blog_" in query["sql"] and query["sql"].startswith("SELECT")
+        and not LOOKUP_TABLE_LOAD.match(query["sql"])
+    ]
+
+
+def _plan_problems(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        details = [row[-1] for row in cursor.fetchall()]
+    return [
+        detail for detail in details
+        if FULL_SCAN.match(detail) or "TEMP B-TREE" in detail
+    ]
+
+
+@pytest.mark.parametrize("page", ["index", "category", "profile", "detail"])
+def test_feed_queries_use_indexes(
+        user, user_client, post_with_published_location, comment_to_a_post,
+        page
+):
+    post = post_with_published_location
+    urls = {
+        "index": "/",
+        "category": f"/category/{post.category.slug}/",
+        "profile": f"/profile/{user.username}/",
+        "detail": f"/posts/{post.id}/",
+    }
+    queries = _blog_queries(user_client, urls[page])
+    assert queries
+    for sql in queries:
+        problems = _plan_problems(sql)
+        assert not problems, (
+            "Убедитесь, что запросы ленты используют индексы и не"
+            f" сортируют результат во временном B-дереве:\n{sql}\n{problems}"
+        )
@@ -0,0 +1,42 @@
+import pickle
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.read_models import PostCard, card_queryset
+
+
+@pytest.mark.django_db
+def test_card_matches_post(post_with_published_location):
+    post = post_with_published_location
+    post.text = " ".join(f"слово{i}" for i in range(20))
+    post.save()
+    with CaptureQueriesContext(connection) as queries:
+        (card,) = card_queryset().filter(pk=post.pk)
+    assert isinstance(card, PostCard)
+    for name in PostCard.__slots__:
+        assert getattr(card, name) == getattr(post, name), name
+    post_sql = next(q["sql"] for q in queries if "blog_post" in q["sql"])
+    assert '"blog_post"."text"' not in post_sql
+    assert '"blog_category"' not in post_sql
+
+
+@pytest.mark.django_db
+def test_card_is_immutable_and_picklable(post_with_published_location):
+    (card,) = card_queryset()
+    with pytest.raises(AttributeError):
+        card.title = "Другой заголовок"
+    with pytest.raises(AttributeError):
+        card.extra = 1
+    assert pickle.loads(pickle.dumps(card)) == card
+
+
+@pytest.mark.django_db
+def test_bench_cards(post_with_published_location):
+    out = StringIO()
+    call_command("bench_cards", "--repeat", "2", stdout=out)
+    assert "PostCard" in out.getvalue()
+    assert "Экономия" in out.getvalue()
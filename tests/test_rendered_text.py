@@ -0,0 +1,45 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Post, TimelineEntry
+
+
+@pytest.mark.django_db
+def test_text_is_rendered_on_save(post_with_published_location):
+    post = post_with_published_location
+    post.text = "<b>Первая</b> строка\nвторая " + "слово " * 20
+    post.save(update_fields=["text"])
+    post.refresh_from_db()
+    assert post.rendered_html.startswith(
+        "&lt;b&gt;Первая&lt;/b&gt; строка<br>вторая"
+    )
+    assert post.excerpt.endswith(" …")
+    assert len(post.excerpt.split()) == 11
+
+
+@pytest.mark.django_db
+def test_detail_page_uses_rendered_html(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.text = "строка\n<script>"
+    post.save()
+    content = user_client.get(f"/posts/{post.pk}/").content.decode()
+    assert "строка<br>&lt;script&gt;" in content
+
+
+@pytest.mark.django_db
+def test_render_posts_backfills_rows(post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(excerpt="", rendered_html="")
+    TimelineEntry.objects.filter(pk=post.pk).update(excerpt="")
+    out = StringIO()
+    call_command("render_posts", "--chunk-size", "1", stdout=out)
+    assert "Обработано постов: 1." in out.getvalue()
+    post.refresh_from_db()
+    assert post.rendered_html and post.excerpt
+    assert TimelineEntry.objects.get(pk=post.pk).excerpt == post.excerpt
+    call_command("render_posts", stdout=out)
+    assert "Обработано постов: 0." in out.getvalue()
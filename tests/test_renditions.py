@@ -0,0 +1,115 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image
+
+from blog.models import Job, Post
+from blog.renditions import rendition_name, webp_name
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path):
+    with override_settings(
+        MEDIA_ROOT=tmp_path, BLOG_SHARED_PAGE_CACHE=False, BLOG_JOB_WORKERS=0
+    ):
+        yield tmp_path
+
+
+def _image(width, height, name="photo.jpg"):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color=(73, 109, 137)).save(
+        buffer, format="JPEG"
+    )
+    return ImageFile(buffer, name=name)
+
+
+def _size(root, name):
+    with Image.open(root / name) as image:
+        return image.size
+
+
+def _upload(post, image, capture):
+    post.image = image
+    with capture(execute=True):
+        post.save()
+    post.refresh_from_db()
+
+
+def test_original_is_served_until_renditions_are_ready(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = _image(2000, 1000)
+    post.save()
+    assert Job.objects.filter(argument=str(post.pk)).exists()
+    assert not post.renditions_ready
+    detail = user_client.get(f"/posts/{post.id}/").content.decode()
+    assert f'src="{post.image.url}" width="2000" height="1000"' in detail
+    assert "srcset" not in detail
+
+
+def test_renditions_are_built_after_commit(
+        media_root, user_client, post_with_published_location,
+        django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+    _upload(post, _image(2000, 1000), django_capture_on_commit_callbacks)
+    name = post.image.name
+    assert post.renditions_ready
+    assert not Job.objects.exists()
+    assert _size(media_root, rendition_name(name, "card")) == (640, 320)
+    assert _size(media_root, rendition_name(name, "detail")) == (1280, 640)
+    for width in (320, 640, 960, 1280):
+        assert _size(media_root, webp_name(name, width)) == (
+            width, width // 2
+        )
+
+    storage = post.image.storage
+    detail = user_client.get(f"/posts/{post.id}/").content.decode()
+    detail_url = storage.url(rendition_name(name, "detail"))
+    assert f'src="{detail_url}" width="1280" height="640">' in detail
+    assert f'{storage.url(webp_name(name, 960))} 960w' in detail
+    category = user_client.get(
+        f"/category/{post.category.slug}/"
+    ).content.decode()
+    card_url = storage.url(rendition_name(name, "card"))
+    assert (
+        f'src="{card_url}" width="640" height="320" loading="lazy">'
+    ) in category
+    assert f'{storage.url(webp_name(name, 320))} 320w' in category
+    assert f'href="{post.image.url}"' in category
+    assert category.count("<picture>") == category.count("<img") - 1 == 1
+
+
+def test_small_images_are_not_upscaled(
+        media_root, post_with_published_location,
+        django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+    _upload(post, _image(300, 200), django_capture_on_commit_callbacks)
+    name = post.image.name
+    assert _size(media_root, rendition_name(name, "card")) == (300, 200)
+    assert _size(media_root, webp_name(name, 300)) == (300, 200)
+    assert not (media_root / webp_name(name, 320)).exists()
+
+
+def test_build_renditions_backfills_missing(
+        media_root, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = _image(2000, 1000)
+    post.save()
+    out = StringIO()
+    call_command("build_renditions", stdout=out)
+    assert "Обработано изображений: 1" in out.getvalue()
+    assert Post.objects.get(pk=post.pk).renditions_ready
+    card = media_root / rendition_name(post.image.name, "card")
+    with Image.open(card) as image:
+        assert image.size == (640, 320)
+    call_command("build_renditions", stdout=out)
+    assert "Обработано изображений: 0" in out.getvalue()
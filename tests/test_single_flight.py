@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+from django.test import override_settings
+
+from blog.single_flight import (
+    FILLED, HIT, STALE, WAITED, acquire_fill_lock, single_flight, store
+)
+
+
+def _fail():
+    raise AssertionError("Значение должен строить владелец блокировки.")
+
+
+def test_fill_happens_once():
+    calls = []
+    for _ in range(3):
+        result = single_flight("key", 1, lambda: calls.append(1) or "v", 60)
+    assert (result, len(calls)) == (("v", HIT), 1)
+
+
+def test_stale_copy_is_served_while_locked():
+    single_flight("key", 1, lambda: "old", 60)
+    assert acquire_fill_lock("key", 2)
+    assert single_flight("key", 2, _fail, 60) == ("old", STALE)
+
+
+@override_settings(BLOG_FILL_WAIT_TIMEOUT=2, BLOG_FILL_POLL_INTERVAL=0.01)
+def test_waiter_gets_value_of_lock_owner():
+    assert acquire_fill_lock("key", 1)
+    timer = threading.Timer(0.05, store, ("key", 1, "new", 60))
+    timer.start()
+    try:
+        assert single_flight("key", 1, _fail, 60) == ("new", WAITED)
+    finally:
+        timer.cancel()
+
+
+@override_settings(BLOG_FILL_WAIT_TIMEOUT=0.05, BLOG_FILL_POLL_INTERVAL=0.01)
+def test_waiter_fills_after_timeout():
+    assert acquire_fill_lock("key", 1)
+    assert single_flight("key", 1, lambda: "own", 60) == ("own", FILLED)
+
+
+@pytest.mark.django_db
+def test_stale_page_has_no_validators(
+        monkeypatch, mixer, user, user_client, post_with_published_location
+):
+    url = f"/profile/{user.username}/"
+    user_client.get(url)
+    mixer.blend("blog.Post", author=user)
+    # Страницу новой версии как будто уже рендерит другой процесс.
+    monkeypatch.setattr(
+        "blog.single_flight.acquire_fill_lock", lambda key, version: False
+    )
+    response = user_client.get(url)
+    assert response.status_code == 200
+    assert not response.has_header("ETag")
+    assert response.content.decode("utf-8").count("<article") == 1
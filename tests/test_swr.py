@@ -0,0 +1,67 @@
+import time
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from blog.single_flight import FILLED, HIT, STALE, store
+from blog.swr import refresh_latency, stale_while_revalidate, staleness
+
+
+def _age(key, seconds):
+    version, value, built_at = cache.get(key)
+    cache.set(key, (version, value, built_at - seconds), 60)
+
+
+@override_settings(BLOG_SWR_SOFT_TTL=30, BLOG_SWR_HARD_TTL=300)
+def test_fresh_entry_is_hit():
+    store("key", 1, "v", 60)
+    assert stale_while_revalidate("key", 1, lambda: "new", 60) == ("v", HIT)
+
+
+@override_settings(
+    BLOG_SWR_SOFT_TTL=30, BLOG_SWR_HARD_TTL=300, BLOG_REFRESH_WORKERS=0
+)
+def test_stale_entry_is_served_and_refreshed():
+    store("key", 1, "old", 60)
+    _age("key", 60)
+    refreshes = refresh_latency.snapshot()["count"]
+    result = stale_while_revalidate("key", 1, lambda: "new", 60)
+    assert result == ("old", STALE)
+    assert cache.get("key")[1] == "new"
+    assert refresh_latency.snapshot()["count"] == refreshes + 1
+    assert staleness.snapshot()["max_ms"] >= 60 * 1000
+
+
+@override_settings(
+    BLOG_SWR_SOFT_TTL=30, BLOG_SWR_HARD_TTL=300, BLOG_REFRESH_WORKERS=0
+)
+def test_new_version_is_refreshed_in_background():
+    store("key", 1, "old", 60)
+    assert stale_while_revalidate("key", 2, lambda: "new", 60) == (
+        "old", STALE
+    )
+    assert stale_while_revalidate("key", 2, lambda: "newer", 60) == (
+        "new", HIT
+    )
+
+
+@override_settings(BLOG_SWR_SOFT_TTL=30, BLOG_SWR_HARD_TTL=300)
+def test_entry_older_than_hard_ttl_is_rebuilt():
+    store("key", 1, "old", 60)
+    _age("key", 600)
+    result = stale_while_revalidate("key", 1, lambda: "new", 60)
+    assert result == ("new", FILLED)
+
+
+@override_settings(
+    BLOG_SWR_SOFT_TTL=0, BLOG_SWR_HARD_TTL=300, BLOG_REFRESH_WORKERS=1
+)
+def test_refresh_runs_in_pool():
+    store("key", 1, "old", 60)
+    assert stale_while_revalidate("key", 1, lambda: "new", 60) == (
+        "old", STALE
+    )
+    deadline = time.monotonic() + 2
+    while cache.get("key")[1] != "new" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get("key")[1] == "new"
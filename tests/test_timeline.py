@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import TimelineEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_timeline_follows_post_changes(
+        mixer, user, post_with_published_location
+):
+    post = post_with_published_location
+    entry = TimelineEntry.objects.get(pk=post.pk)
+    assert (entry.title, entry.author_username) == (
+        post.title, user.username
+    )
+
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    user.username = "renamed"
+    user.save()
+    entry.refresh_from_db()
+    assert (entry.comment_count, entry.author_username) == (2, "renamed")
+
+    post.category.is_published = False
+    post.category.save()
+    assert not TimelineEntry.objects.filter(pk=post.pk).exists()
+
+    post.category.is_published = True
+    post.category.save()
+    post.is_published = False
+    post.save()
+    assert not TimelineEntry.objects.filter(pk=post.pk).exists()
+
+
+def test_index_reads_timeline_only(
+        user_client, many_posts_with_published_locations
+):
+    with CaptureQueriesContext(connection) as context:
+        user_client.get("/")
+    feed_queries = [
+        query["sql"] for query in context.captured_queries
+        if "blog_" in query["sql"]
+    ]
+    assert feed_queries
+    assert all(
+        "blog_timelineentry" in sql and "blog_post" not in sql
+        for sql in feed_queries
+    )
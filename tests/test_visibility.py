@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.visibility import visibility_window
+
+pytestmark = [pytest.mark.django_db]
+
+
+@override_settings(BLOG_VISIBILITY_BUCKET=3600)
+def test_scheduled_post_becomes_visible_on_time(
+        mixer, user, published_category
+):
+    bucket_start, _ = visibility_window(timezone.now())
+    now = bucket_start + timedelta(minutes=1)
+    assert visibility_window(now)[0] == bucket_start
+
+    pub_date = now + timedelta(seconds=10)
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=pub_date
+    )
+    cutoff, expires_at = visibility_window(now)
+    assert (cutoff, expires_at) == (bucket_start, pub_date)
+    assert visibility_window(pub_date)[0] == pub_date
+    assert visibility_window(pub_date - timedelta(microseconds=1))[0] == (
+        bucket_start
+    )
+
+
+def test_feed_queries_repeat_between_publications(
+        user_client, many_posts_with_published_locations
+):
+    user_client.get("/")
+    with CaptureQueriesContext(connection) as context:
+        user_client.get("/")
+    assert not any(
+        "COUNT(" in query["sql"] for query in context.captured_queries
+    ), "Количество постов на главной должно браться из кэша."
@@ -0,0 +1,43 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from blog.management.commands.warm_cache import hot_pages
+from blog.page_cache import page_stats
+
+
+@pytest.mark.django_db(transaction=True)
+def test_warm_cache_renders_hot_pages(
+        mixer, user, post_with_published_location
+):
+    hot = mixer.blend(
+        "blog.Post", author=user,
+        category=post_with_published_location.category
+    )
+    mixer.cycle(2).blend("blog.Comment", post=hot, author=user)
+    paths = hot_pages(10)
+    assert paths[:3] == ["/", "/pages/about/", "/pages/rules/"]
+    assert paths[3] == f"/posts/{hot.pk}/"
+    assert "/posts/create/" not in paths
+    assert "/profile/edit/" not in paths
+
+    out = StringIO()
+    call_command(
+        "warm_cache", "--limit", "10", "--force",
+        stdout=out, stderr=StringIO()
+    )
+    assert f"200  /posts/{hot.pk}/" in out.getvalue()
+    assert f"Прогрето страниц: {len(paths)} из {len(paths)}" in out.getvalue()
+    hits = page_stats.snapshot()["hit"]
+    call_command(
+        "warm_cache", "--limit", "10", "--force",
+        stdout=StringIO(), stderr=StringIO()
+    )
+    assert page_stats.snapshot()["hit"] > hits
+
+
+def test_warm_cache_refuses_process_local_cache():
+    with pytest.raises(CommandError, match="LocMemCache"):
+        call_command("warm_cache", stdout=StringIO())